@@ -1,4 +1,5 @@
 import io
+import hashlib
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -6,14 +7,16 @@ import plotly.express as px
 from datetime import datetime, timedelta, date
 
 # Import modular components
-from parsers import to_date, size_to_effort, parse_skills_importance_cell, normalize_columns
+from parsers import (
+    to_date, size_to_effort, parse_skills_importance_cell, normalize_columns,
+    parse_weekday, to_availability,
+)
 from engine import (
-    clamp01, risk_band, get_risk_color, get_risk_badge_html,
-    compute_skill_risk, compute_schedule_risk, daterange,
-    has_capacity_for_task, add_task_load,
-    estimate_delay_days, person_allocated_skill_total,
-    coverage_missing_and_risk, has_mandatory_skills,
-    has_minimum_skill_coverage,
+    risk_band, risk_band_array, get_risk_color, get_risk_badge_html,
+    batch_person_allocated_skill_total,
+    SkillIndex, EligibilityMatrix, DepartmentIndex, TaskTable,
+    EFFORT_PROFILES, allocate_tasks_parallel, level_resources,
+    AvailabilityCalendar, BusinessDays, employee_key,
 )
 
 # ============================================
@@ -735,6 +738,81 @@ with st.sidebar.expander("Assignment Rules", expanded=True):
         value=True,
         help="Prioritize assignees from the same department"
     )
+    planning_granularity = st.selectbox(
+        "Planning Granularity",
+        options=["Day", "Week"],
+        index=0,
+        help="Day = per-day capacity for near-term detail. Week = capacity and load bucketed by ISO week, much faster for multi-year roadmaps."
+    )
+    bucket_days = 7 if planning_granularity == "Week" else 1
+    business_days_only = st.checkbox(
+        "Business Days Only",
+        value=False,
+        help="Plan on working days (Monday-Friday, minus the dates in the Tasks file's optional Holidays sheet). Weekends and holidays get no capacity, and slack and delays count business days."
+    )
+    effort_placement = st.selectbox(
+        "Effort Placement",
+        options=["Task Profile", "Fill Free Capacity"],
+        index=0,
+        help="Task Profile = spread effort over the task window by its effort profile. Fill Free Capacity = pour effort into the assignee's free capacity from the start date, running past the end date only when the window is full."
+    )
+    placement = "water_fill" if effort_placement == "Fill Free Capacity" else "profile"
+    shift_to_fit = st.checkbox(
+        "Shift Start Dates to Fit Capacity",
+        value=False,
+        help="Allow a task to start later than its target start when that is the earliest point the assignee has capacity"
+    )
+    max_start_slack = st.number_input(
+        "Max Start Slack (days)",
+        min_value=0,
+        max_value=365,
+        value=14,
+        step=1,
+        disabled=not shift_to_fit,
+        help="How far past the target start a task may be moved"
+    )
+    shortlist_k = st.number_input(
+        "Skill Shortlist Size",
+        min_value=0,
+        max_value=10000,
+        value=0,
+        step=5,
+        help="Only check capacity and risk for the top N eligible employees by skill score, widening the list when none of them has capacity. 0 = check everyone."
+    )
+    allocation_workers = st.number_input(
+        "Parallel Workers",
+        min_value=1,
+        max_value=64,
+        value=1,
+        step=1,
+        help="Allocate groups of tasks that share no eligible employees in parallel processes. Results are identical to a single worker."
+    )
+    rolling_horizon = st.checkbox(
+        "Plan As Of Date",
+        value=False,
+        help="Keep tasks that have already started with their current assignee (the file's assignee column, else the last plan made for these files without an As Of Date) and only allocate the rest"
+    )
+    as_of_input = st.date_input(
+        "As Of Date",
+        value=date.today(),
+        disabled=not rolling_horizon,
+        help="Tasks starting before this date are not re-allocated; capacity is only tracked from this date on"
+    )
+    as_of_date = as_of_input if rolling_horizon else None
+    level_after_allocation = st.checkbox(
+        "Level Resources After Allocation",
+        value=False,
+        help="After allocation, move tasks within their slack or hand them to equally skilled eligible colleagues to lower peak utilization"
+    )
+    leveling_budget = st.number_input(
+        "Leveling Time Budget (seconds)",
+        min_value=0.1,
+        max_value=600.0,
+        value=2.0,
+        step=0.5,
+        disabled=not level_after_allocation,
+        help="The leveling pass stops when it can improve nothing further or this time is used up"
+    )
 
 
 # ============================================
@@ -790,7 +868,8 @@ if not st.session_state.allocation_complete:
             type=["xlsx"],
             key="tasks_upl",
             label_visibility="collapsed",
-            help="Required: task_id, task_name, department, start_date, end_date, work_size"
+            help="Required: task_id, task_name, department, start_date, end_date, work_size. "
+                 "Optional \"Holidays\" sheet: date"
         )
         if task_file:
             st.markdown(f"""
@@ -833,7 +912,8 @@ if not st.session_state.allocation_complete:
             type=["xlsx"],
             key="people_upl",
             label_visibility="collapsed",
-            help="Required: employee_id, skill, proficiency, job_level, fte"
+            help="Required: employee_id, skill, proficiency, job_level, fte. "
+                 "Optional \"Availability\" sheet: employee_id, availability, start_date, end_date, weekday"
         )
         if people_file:
             st.markdown(f"""
@@ -1097,9 +1177,25 @@ if not st.session_state.allocation_complete:
         """Cache Excel parsing to avoid re-reading on every Streamlit rerun."""
         return pd.read_excel(file_bytes, sheet_name="Sheet1")
 
+    @st.cache_data
+    def load_availability_sheet(file_bytes, file_name):
+        """Optional "Availability" sheet of the People workbook; None when it has none."""
+        if "Availability" not in pd.ExcelFile(file_bytes).sheet_names:
+            return None
+        return pd.read_excel(file_bytes, sheet_name="Availability")
+
+    @st.cache_data
+    def load_holidays_sheet(file_bytes, file_name):
+        """Optional "Holidays" sheet of the Tasks workbook; None when it has none."""
+        if "Holidays" not in pd.ExcelFile(file_bytes).sheet_names:
+            return None
+        return pd.read_excel(file_bytes, sheet_name="Holidays")
+
     try:
         tasks_raw = load_excel(task_file, task_file.name)
         people_raw = load_excel(people_file, people_file.name)
+        availability_raw = load_availability_sheet(people_file, people_file.name)
+        holidays_raw = load_holidays_sheet(task_file, task_file.name)
         
         # Preserve original Excel row order
         tasks_raw["_excel_order"] = range(len(tasks_raw))
@@ -1131,6 +1227,11 @@ if not st.session_state.allocation_complete:
         st.error(f"People template missing required columns: {', '.join(missing_people)}")
         st.stop()
     
+    # One canonical form for employee ids, so numeric ids read as 101.0 (column with blanks) still match
+    people_raw["employee_id"] = people_raw["employee_id"].map(employee_key)
+    if "assignee" in tasks_raw.columns:
+        tasks_raw["assignee"] = tasks_raw["assignee"].map(employee_key)
+
     # Handle optional priority field
     if "priority" not in tasks_raw.columns:
         tasks_raw["priority"] = "Medium"  # Default priority
@@ -1160,6 +1261,42 @@ if not st.session_state.allocation_complete:
     tasks_raw["start_date"] = tasks_raw["start_date"].apply(to_date)
     tasks_raw["end_date"] = tasks_raw["end_date"].apply(to_date)
     
+    # Optional availability calendar: PTO / ramp-up date ranges and weekly part-time patterns
+    if availability_raw is not None:
+        availability_raw.columns = normalize_columns(availability_raw)
+        missing_availability = [c for c in ["employee_id", "availability"] if c not in availability_raw.columns]
+        if missing_availability:
+            st.error(f"Availability sheet missing required columns: {', '.join(missing_availability)}")
+            st.stop()
+        for col in ["start_date", "end_date", "weekday"]:
+            if col not in availability_raw.columns:
+                availability_raw[col] = None
+        availability_raw["employee_id"] = availability_raw["employee_id"].map(employee_key)
+        availability_raw["start_date"] = availability_raw["start_date"].apply(to_date)
+        availability_raw["end_date"] = availability_raw["end_date"].apply(to_date)
+        # A mistyped weekday or availability would silently change capacity, so stop on any
+        for col, parse in [("weekday", parse_weekday), ("availability", to_availability)]:
+            invalid_values = []
+            for v in availability_raw[col]:
+                try:
+                    parse(v)
+                except ValueError:
+                    invalid_values.append(str(v))
+            if invalid_values:
+                st.error(f"Availability sheet has invalid {col} values: {', '.join(sorted(set(invalid_values)))}")
+                st.stop()
+        availability_raw["weekday"] = availability_raw["weekday"].apply(parse_weekday)
+        availability_raw["availability"] = availability_raw["availability"].apply(to_availability)
+
+    # Optional holiday list for the business-day timeline
+    holidays = []
+    if holidays_raw is not None:
+        holidays_raw.columns = normalize_columns(holidays_raw)
+        if "date" not in holidays_raw.columns:
+            st.error("Holidays sheet missing required column: date")
+            st.stop()
+        holidays = [d for d in holidays_raw["date"].apply(to_date) if d is not None]
+
     # Available skills list
     people_raw["skill"] = people_raw["skill"].astype(str).str.strip()
     skills_list = sorted([s for s in people_raw["skill"].dropna().unique().tolist() if str(s).strip()])
@@ -1319,6 +1456,8 @@ if not st.session_state.allocation_complete:
         with st.expander("Preview: Tasks Data", expanded=False):
             st.dataframe(tasks_raw.head(10), use_container_width=True)
             st.caption(f"Total: {len(tasks_raw)} tasks")
+            if holidays:
+                st.caption(f"Holidays: {len(holidays)} dates")
             # Show phase info if available
             if "phase" in tasks_raw.columns:
                 unique_phases = tasks_raw["phase"].dropna().unique()
@@ -1329,16 +1468,28 @@ if not st.session_state.allocation_complete:
         with st.expander("Preview: People Data", expanded=False):
             st.dataframe(people_raw.head(10), use_container_width=True)
             st.caption(f"Total: {len(people_raw)} skill records")
+            if availability_raw is not None:
+                st.caption(f"Availability: {len(availability_raw)} calendar rules")
     
     # Store data in session state
     st.session_state.tasks_raw = tasks_raw
     st.session_state.people_raw = people_raw
+    st.session_state.availability_raw = availability_raw
+    st.session_state.holidays = holidays
+    # Content digests of the uploads key the caches below (DataFrame ids change on every upload rerun)
+    st.session_state.upload_digest = (
+        hashlib.sha256(task_file.getvalue()).hexdigest(),
+        hashlib.sha256(people_file.getvalue()).hexdigest(),
+    )
 
 # ============================================
 # LOAD DATA FROM SESSION STATE
 # ============================================
 tasks_raw = st.session_state.get("tasks_raw")
 people_raw = st.session_state.get("people_raw")
+availability_raw = st.session_state.get("availability_raw")
+holidays = st.session_state.get("holidays", [])
+upload_digest = st.session_state.get("upload_digest")
 
 if tasks_raw is None or people_raw is None:
     st.error("Data not found. Please upload files and run allocation again.")
@@ -1414,12 +1565,20 @@ for tid, grp in tasks_long.groupby("task_id"):
             phase_val = str(phase_val).strip()
     else:
         phase_val = "Uncategorized"
+    # Handle optional effort profile - how effort is spread over the task window
+    profile_val = "front_loaded"
+    if "effort_profile" in grp.columns and not pd.isna(grp["effort_profile"].iloc[0]):
+        profile_val = str(grp["effort_profile"].iloc[0]).strip().lower().replace(" ", "_").replace("-", "_")
+        if profile_val not in EFFORT_PROFILES:
+            profile_val = "front_loaded"
     task_objs.append({
         "task_id": tid,
         "task_name": grp["task_name"].iloc[0],
         "department": grp["department"].iloc[0],
         "priority": priority_val,
         "phase": phase_val,
+        "effort_profile": profile_val,
+        "assignee": grp["assignee"].iloc[0] if "assignee" in grp.columns else "",
         "work_size": grp["work_size"].iloc[0],
         "work_size_num": float(grp["work_size_num"].iloc[0]),
         "start_date": start,
@@ -1441,146 +1600,108 @@ prio_map = {"critical":0, "high":1, "medium":2, "low":3}
 tasks_df["_prio"] = tasks_df["priority"].astype(str).str.lower().map(prio_map).fillna(2)  # Default to medium
 tasks_df = tasks_df.sort_values(["_prio","start_date"]).drop(columns=["_prio"])
 
-employees = sorted(people_raw["employee_id"].unique().tolist())
+# Skill-side precomputation does not depend on the strictness slider, so it is
+# kept across reruns and only the capacity and greedy stages below are redone.
+_skill_prep_key = (
+    upload_digest,
+    hashlib.sha256(pd.util.hash_pandas_object(skill_inputs, index=True).values.tobytes()).hexdigest(),
+)
+_skill_prep = st.session_state.get("skill_prep")
+if _skill_prep is None or _skill_prep["key"] != _skill_prep_key:
+    _prep_index = SkillIndex.from_people(people_raw)
+    _prep_tasks = TaskTable.from_frame(tasks_df, _prep_index)
+    _skill_prep = {
+        "key": _skill_prep_key,
+        "skill_index": _prep_index,
+        "task_table": _prep_tasks,
+        "eligibility": EligibilityMatrix.build_all(
+            _prep_tasks.task_id,
+            [_prep_tasks.requirements(i) for i in range(len(_prep_tasks))],
+            _prep_index,
+        ),
+        "department_index": (
+            DepartmentIndex.from_people(people_raw, _prep_index)
+            if "department" in people_raw.columns else None
+        ),
+    }
+    st.session_state.skill_prep = _skill_prep
+skill_index = _skill_prep["skill_index"]
+task_table = _skill_prep["task_table"]
+department_index = _skill_prep["department_index"]
+employees = skill_index.employees
 emp_fte = people_raw.groupby("employee_id")["fte"].max().to_dict()
 
-global_start = tasks_df["start_date"].min()
-global_end = tasks_df["end_date"].max()
-all_days = daterange(global_start, global_end)
-daily_load = {e: {d: 0.0 for d in all_days} for e in employees}
+# The calendar keeps its compiled capacity arrays, so it is built once per upload and reused across reruns
+availability = None
+if availability_raw is not None:
+    _calendar = st.session_state.get("availability_calendar")
+    if _calendar is None or _calendar[0] != upload_digest[1]:
+        _calendar = (upload_digest[1], AvailabilityCalendar.from_frame(availability_raw))
+        st.session_state.availability_calendar = _calendar
+    availability = _calendar[1]
+business_days = BusinessDays(holidays) if business_days_only else None
 
-assignments = []
-for _, t in tasks_df.iterrows():
-    tid = t["task_id"]
-    skills_req = t["skills"]
-    required_total = float(t["required_total"])
-    effort = float(t["work_size_num"])
-    d0 = t["start_date"]
-    d1 = t["end_date"]
-    
-    candidates = employees.copy()
-    
-    if team_first and "department" in people_raw.columns:
-        dept = str(t["department"])
-        same_team = sorted(people_raw[people_raw["department"].astype(str)==dept]["employee_id"].unique().tolist())
-        if same_team:
-            candidates = same_team + [e for e in candidates if e not in same_team]
-    
-    best = None
-    best_overall = None
-    
-    for emp in candidates:
-        # STEP 1: Check mandatory skills - employee MUST have ALL mandatory skills (importance >= threshold)
-        # If they have all mandatory skills, they're eligible (even if they don't have optional skills)
-        if not has_mandatory_skills(emp, skills_req, mandatory_threshold, people_raw):
-            continue  # Missing mandatory skills - skip
-        
-        # STEP 1b: Ensure employee has at least SOME matching skills
-        # Prevents assigning someone with zero skill overlap when mandatory check is vacuous
-        if not has_minimum_skill_coverage(emp, skills_req, people_raw):
-            continue  # Zero skill coverage - skip
-        
-        # STEP 2: Check capacity availability within the task's time frame
-        # If employee doesn't have capacity during the task period, skip them
-        _has_cap, estimated_peak_util = has_capacity_for_task(emp, d0, d1, effort, daily_load, emp_fte, max_utilization=1.0)
-        if not _has_cap:
-            continue  # No capacity available during task time frame - skip
-        
-        # STEP 3: Calculate skill match (for risk calculation, not for filtering)
-        # Employee has all mandatory skills and capacity - calculate their skill match
-        allocated_total = person_allocated_skill_total(emp, skills_req, people_raw)
-        
-        # STEP 3: Calculate risks only for employees with skills AND capacity
-        gap_skill_risk = compute_skill_risk(required_total, allocated_total)
-        missing_skills, coverage_risk = coverage_missing_and_risk(emp, skills_req, people_raw)
-        skill_risk = max(gap_skill_risk, coverage_risk)
-        
-        # Use the estimated peak utilization from capacity check
-        util_peak = estimated_peak_util
-        delay_days = estimate_delay_days(emp, d0, d1, effort, daily_load, emp_fte)
-        # Ensure delay_days is an integer for the comparison
-        delay_days_int = int(round(delay_days))
-        sched_risk = compute_schedule_risk(util_peak, delay_days_int)
-        
-        overall = max(skill_risk, sched_risk)
-        
-        if best_overall is None or overall < best_overall or (overall == best_overall and delay_days < best.get("expected_delay_days", 10**9)):
-            best = {
-                "task_id": tid,
-                "task_name": t["task_name"],
-                "department": t["department"],
-                "priority": t["priority"],
-                "phase": str(t.get("phase", "Uncategorized")) if "phase" in t else "Uncategorized",
-                "assignee": emp,
-                "work_size": t["work_size"],
-                "skill_required_total": required_total,
-                "skill_allocated_total": allocated_total,
-                "skill_delta": allocated_total - required_total,
-                "missing_skills": ", ".join(missing_skills) if missing_skills else "",
-                "coverage_risk": float(coverage_risk),
-                "gap_skill_risk": float(gap_skill_risk),
-                "skill_risk": skill_risk,
-                "schedule_risk": sched_risk,
-                "overall_risk": overall,
-                "risk_band": risk_band(overall),
-                "expected_delay_days": int(delay_days),
-                "target_start": d0,
-                "target_end": d1,
-                "planned_start": d0,
-                "planned_finish": d1 + timedelta(days=int(delay_days)),
-                "_excel_order": t.get("_excel_order", 0),
-            }
-            best_overall = overall
-    
-    if best is None:
-        # No one has skills AND capacity - flag as unassigned with delay
-        # Estimate delay by finding when someone might have capacity
-        estimated_delay = 0
-        # Try to find when any eligible employee might have capacity
-        for emp in candidates:
-            if not has_mandatory_skills(emp, skills_req, mandatory_threshold, people_raw):
-                continue
-            allocated_total = person_allocated_skill_total(emp, skills_req, people_raw)
-            if allocated_total <= 0 and required_total > 0:
-                continue
-            # Check if they'll have capacity later (simple heuristic: check 30 days out)
-            future_start = d0 + timedelta(days=30)
-            future_end = d1 + timedelta(days=30)
-            has_capacity_future, _ = has_capacity_for_task(emp, future_start, future_end, effort, daily_load, emp_fte, max_utilization=1.0)
-            if has_capacity_future:
-                estimated_delay = 30  # Rough estimate
-                break
-        
-        best = {
-            "task_id": tid,
-            "task_name": t["task_name"],
-            "department": t["department"],
-            "priority": t["priority"],
-            "phase": str(t.get("phase", "Uncategorized")) if "phase" in t else "Uncategorized",
-            "assignee": "UNASSIGNED",
-            "work_size": t["work_size"],
-            "skill_required_total": required_total,
-            "skill_allocated_total": 0.0,
-            "skill_delta": -required_total,
-            "missing_skills": ", ".join([str(s.get("skill")).strip() for s in skills_req]) if skills_req else "",
-            "coverage_risk": 100.0,
-            "gap_skill_risk": 100.0,
-            "skill_risk": 100.0,
-            "schedule_risk": 100.0,
-            "overall_risk": 100.0,
-            "risk_band": "Critical",
-            "expected_delay_days": estimated_delay,  # Flag delay when unassigned due to capacity
-            "target_start": d0,
-            "target_end": d1,
-            "planned_start": d0,
-            "planned_finish": d1 + timedelta(days=estimated_delay),
-            "_excel_order": t.get("_excel_order", 0),
-        }
-    
-    if best["assignee"] != "UNASSIGNED":
-        add_task_load(best["assignee"], best["planned_start"], best["planned_finish"], effort, daily_load)
-    
-    assignments.append(best)
+# Mandatory-skill and minimum-coverage checks for every task x employee, up front
+eligibility = _skill_prep["eligibility"][mandatory_threshold]
+
+# In rolling-horizon mode, started tasks without an assignee in the file keep the previous plan's.
+# The previous plan is the last one made without an As Of Date for these uploads; rolling runs never
+# replace it, so a rerun cannot pin a task to the assignee the greedy loop picked on the run before.
+current_assignees = None
+previous_plan = st.session_state.get("previous_plan")
+if previous_plan is not None and previous_plan["upload_digest"] != upload_digest:
+    previous_plan = None
+if as_of_date is not None and previous_plan is not None:
+    current_assignees = [
+        a or previous_plan["assignees"].get(str(tid), "") for a, tid in zip(task_table.assignee, task_table.task_id)
+    ]
+
+# Greedy allocation in priority order; independent groups of tasks can run in parallel
+assignments, allocation_stats = allocate_tasks_parallel(
+    task_table, skill_index, eligibility, emp_fte,
+    workers=int(allocation_workers),
+    department_index=department_index,
+    team_first=team_first,
+    bucket_days=bucket_days,
+    shift_to_fit=shift_to_fit,
+    max_start_slack=max_start_slack,
+    shortlist_k=shortlist_k,
+    as_of=as_of_date,
+    current_assignees=current_assignees,
+    placement=placement,
+    availability=availability,
+    business_days=business_days,
+)
+leveling_stats = None
+if level_after_allocation:
+    # Later start shifts are only allowed when start shifting is on, up to the same slack
+    assignments, leveling_stats = level_resources(
+        assignments, task_table, skill_index, eligibility, emp_fte,
+        bucket_days=bucket_days,
+        max_shift_days=int(max_start_slack) if shift_to_fit else 0,
+        time_budget=float(leveling_budget),
+        placement=placement,
+        availability=availability,
+        business_days=business_days,
+        as_of=as_of_date,
+    )
+if allocation_stats["unrostered_assignees"]:
+    unrostered = allocation_stats["unrostered_assignees"]
+    st.warning(
+        f"{len(unrostered)} started task(s) are assigned to people missing from the People file, so their "
+        f"remaining load is not counted against anyone's capacity: "
+        + ", ".join(f"{tid} ({assignee})" for tid, assignee in unrostered[:10])
+        + ("..." if len(unrostered) > 10 else "")
+    )
+if as_of_date is None:
+    st.session_state.previous_plan = {
+        "upload_digest": upload_digest,
+        "assignees": {
+            str(row["task_id"]): row["assignee"] for row in assignments if row["assignee"] != "UNASSIGNED"
+        },
+    }
+shortlist_widenings = allocation_stats["shortlist_widenings"]  # Extra shortlist tiers evaluated across all tasks
+shortlist_widened_tasks = allocation_stats["shortlist_widened_tasks"]  # Tasks whose first shortlist had nobody with capacity
 
 assign_df = pd.DataFrame(assignments)
 
@@ -1607,6 +1728,16 @@ with st.sidebar:
                 st.write(f"- Task {row['task_id']}: {row['task_name'][:40]}...")
                 st.write(f"  Missing: {row['missing_skills'][:60]}...")
         
+        if shortlist_k:
+            st.write(f"**Shortlist Widened:** {shortlist_widened_tasks} of {total_tasks} tasks ({shortlist_widenings} extra tiers, top {shortlist_k})")
+        
+        if leveling_stats is not None:
+            st.write(
+                f"**Leveling:** peak utilization {leveling_stats['peak_before']:.0%} → {leveling_stats['peak_after']:.0%}, "
+                f"variance {leveling_stats['variance_before']:.4f} → {leveling_stats['variance_after']:.4f} "
+                f"({leveling_stats['shifts']} shifts, {leveling_stats['reassignments']} reassignments, {leveling_stats['seconds']:.1f}s)"
+            )
+        
         # Show employee count
         st.write(f"**Total Employees:** {len(employees)}")
         st.write(f"**Employees with Assignments:** {len(assign_df[assign_df['assignee'] != 'UNASSIGNED']['assignee'].unique())}")
@@ -1698,6 +1829,9 @@ with tabs[0]:
         # Get all phases and sort by Excel order (earliest appearance in Excel)
         phase_excel_order = gantt_df.groupby("phase")["_excel_order"].min().sort_values()
         phases_sorted = phase_excel_order.index.tolist()
+        # Average risk and its band for every phase summary row, banded in one call
+        phase_avg_risk = {phase: gantt_df.loc[gantt_df["phase"] == phase, "overall_risk"].mean() for phase in phases_sorted}
+        phase_bands = dict(zip(phases_sorted, risk_band_array(list(phase_avg_risk.values()))))
         
         # Initialize session state for expanded phases if not exists
         if "expanded_phases" not in st.session_state:
@@ -1714,8 +1848,8 @@ with tabs[0]:
             # Calculate phase summary
             phase_start = phase_tasks["Start"].min()
             phase_finish = phase_tasks["Finish"].max()
-            avg_risk = phase_tasks["overall_risk"].mean()
-            phase_risk_band = risk_band(avg_risk)
+            avg_risk = phase_avg_risk[phase]
+            phase_risk_band = phase_bands[phase]
             task_count = len(phase_tasks)
             assigned_count = len(phase_tasks[phase_tasks["assignee"] != "UNASSIGNED"])
             
@@ -2922,8 +3056,8 @@ with tabs[3]:
     # Candidate comparison
     with st.expander("Candidate Skill Comparison", expanded=False):
         cand = []
-        for emp in employees:
-            allocated_total = person_allocated_skill_total(emp, tinfo["skills"], people_raw)
+        allocated_totals = batch_person_allocated_skill_total(tinfo["skills"], skill_index)
+        for emp, allocated_total in zip(employees, allocated_totals):
             cand.append({
                 "Employee": emp,
                 "Allocated Skill Score": f"{allocated_total:.2f}",
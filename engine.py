@@ -5,9 +5,20 @@ Core allocation algorithm, risk scoring, and capacity planning logic.
 No Streamlit dependency - can be tested independently.
 """
 
+import math
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 from datetime import date, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    import numba
+except ImportError:  # Optional - the engine kernels fall back to NumPy
+    numba = None
 
 
 # ============================================
@@ -73,6 +84,55 @@ def compute_schedule_risk(utilization_peak: float, delay_days: int) -> float:
     return float(clamp01(base / 100.0) * 100.0 if base > 100 else base)
 
 
+# Array versions of the scorers above. Each returns exactly what the scalar
+# function gives element by element, so whole candidate sets or result
+# columns can be scored in one call.
+
+RISK_BANDS = ("Low", "Medium", "High", "Critical")
+
+
+def clamp01_array(x) -> np.ndarray:
+    x = np.asarray(x, dtype=float)
+    return np.where(np.isnan(x), 1.0, np.clip(x, 0.0, 1.0))  # max(0, min(1, nan)) is 1.0
+
+
+def risk_band_array(scores) -> np.ndarray:
+    """Map 0-100 risk scores to categorical bands (same cut points as risk_band)."""
+    idx = np.digitize(np.asarray(scores, dtype=float), [20.0, 50.0, 70.0], right=True)
+    return np.array(RISK_BANDS, dtype=object)[idx]
+
+
+def compute_skill_risk_array(required_total, allocated_total) -> np.ndarray:
+    """Vectorized compute_skill_risk; either argument may be a scalar."""
+    required_total, allocated_total = np.broadcast_arrays(
+        np.asarray(required_total, dtype=float), np.asarray(allocated_total, dtype=float)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac_missing = (required_total - allocated_total) / required_total
+    return np.select(
+        [required_total <= 0, allocated_total >= required_total],
+        [0.0, 0.0],
+        default=clamp01_array(frac_missing) * 100.0,
+    )
+
+
+def compute_schedule_risk_array(utilization_peak, delay_days) -> np.ndarray:
+    """Vectorized compute_schedule_risk; either argument may be a scalar."""
+    utilization_peak, delay_days = np.broadcast_arrays(
+        np.asarray(utilization_peak, dtype=float), np.asarray(delay_days, dtype=float)
+    )
+    util_component = np.where(
+        utilization_peak > 1.0, clamp01_array((utilization_peak - 1.0) / 1.0) * 60.0, 0.0
+    )
+    delay_component = clamp01_array(delay_days / 20.0) * 40.0
+    base = util_component + delay_component
+    return np.select(
+        [(utilization_peak <= 1.0 + 1e-6) & (delay_days <= 0), base > 100],
+        [0.0, clamp01_array(base / 100.0) * 100.0],
+        default=base,
+    )
+
+
 # ============================================
 # DATE UTILITIES
 # ============================================
@@ -87,55 +147,917 @@ def daterange(d0: date, d1: date) -> list:
     return [d0 + timedelta(days=i) for i in range(days + 1)]
 
 
+# The engine's LoadMatrix path works on integer day ordinals (date.toordinal)
+# so window arithmetic and memo keys are plain ints. Dates are converted once
+# when tasks are loaded and converted back only for display.
+
+Day = Union[date, int]  # A date or a day ordinal
+
+
+def day_ordinal(d: Day) -> int:
+    """Day ordinal of a date (``date.toordinal``); ints pass through unchanged."""
+    if isinstance(d, (int, np.integer)):
+        return int(d)
+    return d.toordinal()
+
+
+def day_ordinals(dates) -> np.ndarray:
+    """Day ordinals of a sequence of dates as an int32 array."""
+    return np.array([day_ordinal(d) for d in dates], dtype=np.int32)
+
+
+def ordinal_date(n: int) -> date:
+    """Date for a day ordinal."""
+    return date.fromordinal(int(n))
+
+
+def add_days(d: Day, n: int) -> Day:
+    """Shift a date or a day ordinal by ``n`` days, keeping its type."""
+    if isinstance(d, (int, np.integer)):
+        return int(d) + n
+    return d + timedelta(days=n)
+
+
+# Day ordinal of numpy's datetime64 day 0 (1970-01-01)
+_UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class BusinessDays:
+    """
+    Business-day timeline axis: the working days of ``weekmask`` minus ``holidays``.
+
+    Business days are numbered consecutively, so the engine's window, slack
+    and delay arithmetic runs unchanged on the indices while weekends and
+    holidays take no columns and give no capacity. Dates are mapped onto
+    the axis when tasks are allocated and back when rows are written.
+
+    - holidays: any iterable of dates (or day ordinals), e.g. a company list
+      or one generated by a holiday library
+    - weekmask: numpy busday weekmask, Monday first ("1111100" = Mon-Fri)
+    """
+
+    def __init__(self, holidays=(), weekmask: str = "1111100"):
+        ordinals = sorted({day_ordinal(d) for d in holidays if d is not None and not pd.isna(d)})
+        self.holidays = [ordinal_date(o) for o in ordinals]
+        self.weekmask = weekmask
+        self.key = (weekmask, tuple(ordinals))
+        self._calendar = np.busdaycalendar(
+            weekmask=weekmask,
+            holidays=(np.array(ordinals, dtype=np.int64) - _UNIX_EPOCH_ORDINAL).astype("datetime64[D]"),
+        )
+        # Index 0 is the first business day on or after 1970-01-01
+        self._epoch = np.busday_offset(np.datetime64(0, "D"), 0, roll="forward", busdaycal=self._calendar)
+
+    def __reduce__(self):
+        # numpy's busdaycalendar does not pickle; rebuild it in worker processes
+        return type(self), (self.holidays, self.weekmask)
+
+    @property
+    def week_length(self) -> int:
+        """Business days in a week without holidays (bucket size for week granularity)."""
+        return self.weekmask.count("1")
+
+    def _datetimes(self, days) -> np.ndarray:
+        return (np.asarray(days, dtype=np.int64) - _UNIX_EPOCH_ORDINAL).astype("datetime64[D]")
+
+    def start_index(self, days) -> np.ndarray:
+        """Business-day index of each day ordinal; a day off maps to the next business day."""
+        return np.busday_count(self._epoch, self._datetimes(days), busdaycal=self._calendar)
+
+    def end_index(self, days) -> np.ndarray:
+        """Business-day index of each day ordinal; a day off maps to the previous business day."""
+        return np.busday_count(self._epoch, self._datetimes(np.asarray(days) + 1), busdaycal=self._calendar) - 1
+
+    def ordinals(self, indices) -> np.ndarray:
+        """Day ordinal of each business-day index."""
+        days = np.busday_offset(self._epoch, np.asarray(indices, dtype=np.int64), busdaycal=self._calendar)
+        return days.astype(np.int64) + _UNIX_EPOCH_ORDINAL
+
+    def date(self, index: int) -> date:
+        """Date of one business-day index."""
+        return ordinal_date(self.ordinals(index))
+
+    def bucket_days(self, bucket_days: int) -> int:
+        """Bucket size on this axis: week granularity (7 calendar days) becomes one working week."""
+        return self.week_length if int(bucket_days) == 7 else int(bucket_days)
+
+
+# ============================================
+# ENGINE KERNELS
+# ============================================
+
+# The inner loops of the capacity check, load placement, delay estimation and
+# candidate scoring. Each kernel has a NumPy implementation and an explicit
+# loop implementation written in the subset Numba compiles; both give
+# bit-identical results. The module-level names (window_peaks, ...) are bound
+# by set_kernel_backend: compiled loops when Numba is installed, NumPy otherwise.
+
+def _window_peaks_numpy(load, rows, lo, add, col_caps):
+    n = add.shape[1]
+    window = np.zeros((len(rows), n), dtype=float)
+    a, b = max(lo, 0), min(lo + n, load.shape[1])
+    if a < b:
+        window[:, a - lo:b - lo] = load[rows, a:b]
+    return ((window + add) / col_caps).max(axis=1)
+
+
+def _window_peaks_loops(load, rows, lo, add, col_caps):
+    n_cols = load.shape[1]
+    out = np.empty(len(rows))
+    for i in range(len(rows)):
+        ai = i if add.shape[0] > 1 else 0
+        peak = -np.inf
+        for j in range(add.shape[1]):
+            c = lo + j
+            v = load[rows[i], c] if 0 <= c < n_cols else 0.0
+            u = (v + add[ai, j]) / col_caps[i, j]
+            if u > peak:
+                peak = u
+        out[i] = peak
+    return out
+
+
+def _first_fitting_window_numpy(padded, starts, add, padded_caps, max_util):
+    windows = np.lib.stride_tricks.sliding_window_view(padded, add.shape[1])
+    cap_windows = np.lib.stride_tricks.sliding_window_view(padded_caps, add.shape[1])
+    for k in range(0, len(starts), 64):
+        chunk = starts[k:k + 64]
+        chunk_add = add if add.shape[0] == 1 else add[k:k + 64]
+        peaks = ((windows[chunk] + chunk_add) / cap_windows[chunk]).max(axis=1)
+        fits = np.flatnonzero(peaks <= max_util)
+        if len(fits):
+            return k + int(fits[0])
+    return -1
+
+
+def _first_fitting_window_loops(padded, starts, add, padded_caps, max_util):
+    for k in range(len(starts)):
+        s = starts[k]
+        ak = k if add.shape[0] > 1 else 0
+        fits = True
+        for j in range(add.shape[1]):
+            if not (padded[s + j] + add[ak, j]) / padded_caps[s + j] <= max_util:
+                fits = False
+                break
+        if fits:
+            return k
+    return -1
+
+
+def _rebuild_ancestors_numpy(t, d, row, lo, hi):
+    lo >>= 1
+    hi >>= 1
+    while lo >= 1:
+        p = np.arange(lo, hi + 1)
+        t[row, lo:hi + 1] = np.maximum(t[row, 2 * p], t[row, 2 * p + 1]) + d[row, lo:hi + 1]
+        lo >>= 1
+        hi >>= 1
+
+
+def _rebuild_ancestors_loops(t, d, row, lo, hi):
+    lo >>= 1
+    hi >>= 1
+    while lo >= 1:
+        for p in range(lo, hi + 1):
+            t[row, p] = max(t[row, 2 * p], t[row, 2 * p + 1]) + d[row, p]
+        lo >>= 1
+        hi >>= 1
+
+
+def _free_prefix_sums_numpy(load_row, col_caps):
+    cum = np.zeros(len(load_row) + 1, dtype=float)
+    np.cumsum(np.maximum(0.0, col_caps - load_row), out=cum[1:])
+    return cum
+
+
+def _free_prefix_sums_loops(load_row, col_caps):
+    cum = np.zeros(len(load_row) + 1)
+    total = 0.0
+    for i in range(len(load_row)):
+        free = col_caps[i] - load_row[i]
+        if free > 0.0:
+            total += free
+        cum[i + 1] = total
+    return cum
+
+
+def _candidate_skill_risks_numpy(required_total, allocated, coverage):
+    gap = compute_skill_risk_array(required_total, allocated)
+    return gap, np.maximum(gap, coverage)
+
+
+def _candidate_skill_risks_loops(required_total, allocated, coverage):
+    gap = np.zeros(len(allocated))
+    skill = np.empty(len(allocated))
+    for i in range(len(allocated)):
+        if required_total > 0 and allocated[i] < required_total:
+            frac = (required_total - allocated[i]) / required_total
+            gap[i] = min(1.0, max(0.0, frac)) * 100.0
+        skill[i] = max(gap[i], coverage[i])
+    return gap, skill
+
+
+# name -> (NumPy implementation, loop implementation)
+_KERNELS = {
+    "window_peaks": (_window_peaks_numpy, _window_peaks_loops),
+    "first_fitting_window": (_first_fitting_window_numpy, _first_fitting_window_loops),
+    "rebuild_ancestors": (_rebuild_ancestors_numpy, _rebuild_ancestors_loops),
+    "free_prefix_sums": (_free_prefix_sums_numpy, _free_prefix_sums_loops),
+    "candidate_skill_risks": (_candidate_skill_risks_numpy, _candidate_skill_risks_loops),
+}
+KERNEL_BACKENDS = ("numba", "numpy", "python")
+_compiled_kernels: dict = {}
+kernel_backend = None
+
+
+def set_kernel_backend(backend: str):
+    """
+    Choose the engine kernel implementations.
+
+    - "numba": loop kernels compiled with numba.njit (compiled on first switch)
+    - "numpy": vectorized NumPy kernels
+    - "python": the loop kernels uncompiled; slow, for checking the loops
+    """
+    global kernel_backend
+    if backend not in KERNEL_BACKENDS:
+        raise ValueError(f"Unknown kernel backend {backend!r}; expected one of {KERNEL_BACKENDS}")
+    if backend == "numba" and numba is None:
+        raise ImportError("The numba kernel backend needs numba installed")
+    for name, (numpy_impl, loops_impl) in _KERNELS.items():
+        if backend == "numba":
+            if name not in _compiled_kernels:
+                _compiled_kernels[name] = numba.njit(cache=True)(loops_impl)
+            globals()[name] = _compiled_kernels[name]
+        elif backend == "numpy":
+            globals()[name] = numpy_impl
+        else:
+            globals()[name] = loops_impl
+    kernel_backend = backend
+
+
+# Peak of (load + add) / column capacity over a window per row: (load, rows, lo, add[rows or 1 x window], col_caps[rows x window]) -> peaks
+window_peaks = _window_peaks_numpy
+# Index of the first start whose window fits under max_util, or -1: (padded, starts, add[starts or 1 x window], padded_caps, max_util)
+first_fitting_window = _first_fitting_window_numpy
+# Segment-tree ancestors of leaves lo..hi recomputed in place after a range add to a built row: (t, d, row, lo, hi)
+rebuild_ancestors = _rebuild_ancestors_numpy
+# Prefix sums of max(0, column capacity - load): (load_row, col_caps) -> n + 1 sums
+free_prefix_sums = _free_prefix_sums_numpy
+# Gap and overall skill risk per candidate: (required_total, allocated, coverage) -> (gap, skill)
+candidate_skill_risks = _candidate_skill_risks_numpy
+
+set_kernel_backend("numba" if numba is not None else "numpy")
+
+
+# ============================================
+# AVAILABILITY CALENDARS
+# ============================================
+
+# Compiled layouts (employees, start, columns, bucket size) an AvailabilityCalendar keeps
+CALENDAR_CACHE_LAYOUTS = 8
+
+
+class AvailabilityCalendar:
+    """
+    Per-employee availability as a fraction of FTE (0 = away, 1 = fully available).
+
+    Each rule is (first day, last day, weekday, availability) with open
+    ends as None and weekday -1 for every day:
+
+    - weekday rules are weekly patterns (e.g. 0 on Fridays for a four-day
+      week), limited to their date range when one is given
+    - rules without a weekday override every day in their range (PTO,
+      ramp-up at 0.5, ...) and win over patterns
+
+    Later rules of the same kind win over earlier ones; uncovered days are
+    fully available. ``compile`` turns the rules into available days per
+    LoadMatrix column and keeps the result per layout, so repeated runs
+    over the same horizon reuse it.
+    """
+
+    def __init__(self, rules: Dict[str, list]):
+        self.rules = {
+            emp: sorted(emp_rules, key=lambda r: r[2] < 0)  # Patterns first, overrides on top (stable)
+            for emp, emp_rules in rules.items() if emp_rules
+        }
+        self._compiled: "OrderedDict[tuple, Optional[np.ndarray]]" = OrderedDict()
+
+    @classmethod
+    def from_frame(cls, availability_df: pd.DataFrame) -> "AvailabilityCalendar":
+        """
+        Build from rows of ``employee_id`` and ``availability`` plus optional
+        ``start_date`` / ``end_date`` (dates or None) and ``weekday`` (0 = Monday
+        .. 6, or None), in precedence order. Raises ValueError for a weekday
+        that is not blank or a whole number 0-6, or an availability outside 0-1.
+        """
+        rules: Dict[str, list] = {}
+        for row in availability_df.to_dict("records"):
+            first, last = row.get("start_date"), row.get("end_date")
+            weekday = row.get("weekday")
+            if weekday is None or pd.isna(weekday) or (isinstance(weekday, str) and not weekday.strip()):
+                weekday = -1
+            else:
+                try:
+                    value = float(weekday)
+                except (TypeError, ValueError):
+                    value = float("nan")
+                if not (value.is_integer() and 0 <= value <= 6):
+                    raise ValueError(f"Weekday {weekday!r} for {row['employee_id']} is not 0 (Monday) - 6 (Sunday)")
+                weekday = int(value)
+            availability = float(row["availability"])
+            if not 0.0 <= availability <= 1.0:
+                raise ValueError(f"Availability {row['availability']!r} for {row['employee_id']} is not within 0-1")
+            rules.setdefault(employee_key(row["employee_id"]), []).append((
+                day_ordinal(first) if first is not None and not pd.isna(first) else None,
+                day_ordinal(last) if last is not None and not pd.isna(last) else None,
+                weekday,
+                availability,
+            ))
+        return cls(rules)
+
+    def __len__(self) -> int:
+        return sum(len(r) for r in self.rules.values())
+
+    def daily(self, emp_id: str, days: np.ndarray) -> np.ndarray:
+        """Availability fraction on each of ``days`` (day ordinals)."""
+        out = np.ones(len(days), dtype=float)
+        for first, last, weekday, availability in self.rules.get(emp_id, ()):
+            mask = np.ones(len(days), dtype=bool)
+            if first is not None:
+                mask &= days >= first
+            if last is not None:
+                mask &= days <= last
+            if weekday >= 0:
+                mask &= (days - 1) % 7 == weekday  # Ordinal 1 (0001-01-01) is a Monday
+            out[mask] = availability
+        return out
+
+    def compile(
+        self,
+        employees: list,
+        start_ord: int,
+        n_cols: int,
+        bucket_days: int,
+        business_days: Optional[BusinessDays] = None,
+    ) -> Optional[np.ndarray]:
+        """
+        Available days per column, shape (len(employees), n_cols), for a LoadMatrix layout.
+
+        Column capacity is fte * available days (see LoadMatrix.col_capacities).
+        None when no rule applies to these employees (every column has
+        bucket_days days).
+        On a business-day axis start_ord is a business-day index.
+        """
+        key = (tuple(employees), start_ord, n_cols, bucket_days, business_days.key if business_days is not None else None)
+        if key in self._compiled:
+            self._compiled.move_to_end(key)
+            return self._compiled[key]
+        compiled = None
+        if any(e in self.rules for e in employees) and n_cols > 0:
+            compiled = np.full((len(employees), n_cols), float(bucket_days))
+            days = start_ord + np.arange(n_cols * bucket_days)
+            if business_days is not None:
+                days = business_days.ordinals(days)
+            for row, emp in enumerate(employees):
+                if emp in self.rules:
+                    compiled[row] = self.daily(emp, days).reshape(n_cols, bucket_days).sum(axis=1)
+        self._compiled[key] = compiled
+        if len(self._compiled) > CALENDAR_CACHE_LAYOUTS:
+            self._compiled.popitem(last=False)
+        return compiled
+
+
+# ============================================
+# LOAD MATRIX
+# ============================================
+
+def fit_to_share(amounts: np.ndarray, share: np.ndarray) -> np.ndarray:
+    """
+    Reweight per-column amounts by availability shares, one row per row of ``share``.
+
+    Each row sums to ``amounts.sum()`` again; rows with no availability at
+    all keep ``amounts`` unchanged.
+    """
+    weighted = amounts * share
+    total = weighted.sum(axis=1, keepdims=True)
+    fitted = weighted * (amounts.sum() / np.where(total > 0, total, 1.0))
+    return np.where(total > 0, fitted, amounts)
+
+
+class LoadSegmentTree:
+    """
+    Max segment tree with lazy range-add, one tree per row (employee).
+
+    All rows share one layout so a range-max over many employees costs
+    O(log days) array operations. Leaves sit at ``t[:, size + i]``; node p has
+    children 2p and 2p+1, and ``d[:, p]`` holds an add already counted in
+    ``t[:, p]`` but not yet pushed to its children.
+    """
+
+    def __init__(self, n_rows: int, n: int):
+        self.n = n
+        self.size = 1
+        while self.size < max(1, n):
+            self.size *= 2
+        self.h = self.size.bit_length() - 1
+        self.t = np.zeros((n_rows, 2 * self.size), dtype=float)
+        self.d = np.zeros((n_rows, self.size), dtype=float)
+
+    def _apply(self, rows, p: int, value):
+        self.t[rows, p] += value
+        if p < self.size:
+            self.d[rows, p] += value
+
+    def _push(self, rows, leaf: int):
+        """Push pending adds down the path from the root to ``leaf``."""
+        for s in range(self.h, 0, -1):
+            i = leaf >> s
+            pending = self.d[rows, i]
+            if np.any(pending != 0):
+                self._apply(rows, 2 * i, pending)
+                self._apply(rows, 2 * i + 1, pending)
+                self.d[rows, i] = 0.0
+
+    def _rebuild(self, row: int, lo: int, hi: int):
+        """Recompute every ancestor of nodes lo..hi (inclusive), level by level."""
+        rebuild_ancestors(self.t, self.d, row, lo, hi)
+
+    def range_add(self, row: int, l: int, r: int, value: float):
+        """Add ``value`` to every day in [l, r) of one row, lazily."""
+        if l >= r:
+            return
+        lo, hi = l + self.size, r + self.size
+        a, b = lo, hi
+        while a < b:
+            if a & 1:
+                self._apply(row, a, value)
+                a += 1
+            if b & 1:
+                b -= 1
+                self._apply(row, b, value)
+            a >>= 1
+            b >>= 1
+        self._rebuild(row, lo, lo)
+        self._rebuild(row, hi - 1, hi - 1)
+
+    def add_values(self, row: int, l: int, values: np.ndarray):
+        """Add a different amount to each day from l onwards (one leaf per value)."""
+        if len(values) == 0:
+            return
+        lo = l + self.size
+        hi = lo + len(values) - 1
+        self.t[row, lo:hi + 1] += values
+        self._rebuild(row, lo, hi)
+
+    def load_rows(self, rows: np.ndarray, values: np.ndarray):
+        """Rebuild ``rows`` from scratch to hold ``values`` (rows x days), dropping pending adds."""
+        self.t[rows] = 0.0
+        self.d[rows] = 0.0
+        self.t[rows, self.size:self.size + values.shape[1]] = values
+        lo = self.size
+        while lo > 1:
+            hi, lo = lo, lo >> 1
+            self.t[rows, lo:hi] = np.maximum(self.t[rows, 2 * lo:2 * hi:2], self.t[rows, 2 * lo + 1:2 * hi:2])
+
+    def range_max(self, rows, l: int, r: int) -> np.ndarray:
+        """Maximum over days [l, r) for each of ``rows``."""
+        rows = np.atleast_1d(rows)
+        res = np.full(len(rows), -np.inf)
+        if l >= r:
+            return res
+        a, b = l + self.size, r + self.size
+        self._push(rows, a)
+        self._push(rows, b - 1)
+        while a < b:
+            if a & 1:
+                res = np.maximum(res, self.t[rows, a])
+                a += 1
+            if b & 1:
+                b -= 1
+                res = np.maximum(res, self.t[rows, b])
+            a >>= 1
+            b >>= 1
+        return res
+
+
+# Distinct (window, effort, profile) keys whose peak utilizations LoadMatrix keeps
+PEAK_MEMO_WINDOWS = 64
+
+
+class LoadMatrix:
+    """
+    Employee x time-bucket load array over a fixed planning horizon.
+
+    Drop-in replacement for the ``{emp: {date: load}}`` dict accepted by the
+    capacity and load functions below. Reads outside the horizon return 0.0
+    and writes outside it are dropped, matching the dict behaviour.
+
+    Each column is a bucket of ``bucket_days`` days (1 = day granularity).
+    With 7-day buckets the horizon starts on a Monday so columns are ISO
+    weeks. Bucket load is the effort placed in the bucket, and utilization
+    is load / (fte * bucket_days). With an AvailabilityCalendar the days a
+    column counts are the employee's available days in it instead; columns
+    outside the horizon are always fully available.
+
+    A LoadSegmentTree over ``load`` answers window peaks in O(log columns).
+    A row's tree is built from ``load`` the first time ``window_max`` asks
+    for it and updated with lazy range adds from then on, so runs that never
+    ask for peaks pay nothing for it. Always write through ``add`` so the
+    tree and prefix sums stay in sync.
+
+    Days may be passed as dates or as day ordinals; dates returned by the
+    matrix (``covered_on``) are day ordinals. On a BusinessDays axis every
+    day is a business-day index instead, buckets are runs of business days
+    and ``business_days`` lines the availability calendar up with them.
+    """
+
+    def __init__(
+        self,
+        employees: list,
+        start: Day,
+        end: Day,
+        bucket_days: int = 1,
+        availability: Optional[AvailabilityCalendar] = None,
+        business_days: Optional[BusinessDays] = None,
+    ):
+        self.employees = list(employees)
+        self.emp_pos = {e: i for i, e in enumerate(self.employees)}
+        self.bucket_days = max(1, int(bucket_days))
+        start_ord = day_ordinal(start) if start is not None else None
+        if start_ord is not None and self.bucket_days == 7 and business_days is None:
+            start_ord -= (start_ord - 1) % 7  # Ordinal 1 (0001-01-01) is a Monday
+        self.start_ord = start_ord
+        if start_ord is None:
+            self.start = None
+        else:
+            self.start = business_days.date(start_ord) if business_days is not None else ordinal_date(start_ord)
+        if start_ord is not None and end is not None and day_ordinal(end) >= start_ord:
+            self.n_cols = (day_ordinal(end) - start_ord) // self.bucket_days + 1
+        else:
+            self.n_cols = 0
+        self.load = np.zeros((len(self.employees), self.n_cols), dtype=float)
+        # Available days per column, or None when every column has bucket_days
+        self.available = None
+        if availability is not None and start_ord is not None:
+            self.available = availability.compile(self.employees, start_ord, self.n_cols, self.bucket_days, business_days)
+        # row -> (cap, prefix sums of free capacity); dropped whenever the row changes
+        self._free_cum: Dict[int, Tuple[float, np.ndarray]] = {}
+        # Built on first use; rows still flagged stale are built from ``load`` when first queried
+        self.tree: Optional[LoadSegmentTree] = None
+        self._tree_stale = np.ones(len(self.employees), dtype=bool)
+        # Bumped on every write to a row; cached estimates are reused only while it matches
+        self.version = np.zeros(len(self.employees), dtype=np.int64)
+        self._row_memo: Dict[int, Tuple[int, dict]] = {}
+        self._peak_memo: "OrderedDict[tuple, Tuple[np.ndarray, np.ndarray, np.ndarray]]" = OrderedDict()
+
+    def offset(self, d: Day) -> int:
+        """Integer day offset of a date or day ordinal from the start of the horizon."""
+        return day_ordinal(d) - self.start_ord
+
+    def column(self, d: Day) -> int:
+        """Column (bucket) holding a date; negative before the horizon."""
+        return self.offset(d) // self.bucket_days
+
+    def col_capacity(self, cap: float) -> float:
+        """Capacity of one fully available column for an employee with ``cap`` FTE."""
+        return cap * self.bucket_days
+
+    def col_capacities(self, rows, lo: int, n: int, caps) -> np.ndarray:
+        """
+        Capacity of columns lo..lo+n-1 for each row, shape (len(rows), n); ``caps`` is the FTE per row.
+
+        A column counts at least 0.01 available days per day, like a zero
+        FTE, so utilization stays finite on days off.
+        """
+        days = np.full((len(rows), n), float(self.bucket_days))
+        if self.available is not None:
+            a, b = max(lo, 0), min(lo + n, self.n_cols)
+            if a < b:
+                days[:, a - lo:b - lo] = np.maximum(self.available[rows, a:b], 0.01 * self.bucket_days)
+        return np.asarray(caps, dtype=float).reshape(-1, 1) * days
+
+    def available_share(self, rows, lo: int, n: int) -> Optional[np.ndarray]:
+        """Share of columns lo..lo+n-1 each row is available, shape (len(rows), n); None without a calendar."""
+        if self.available is None:
+            return None
+        share = np.ones((len(rows), n))
+        a, b = max(lo, 0), min(lo + n, self.n_cols)
+        if a < b:
+            share[:, a - lo:b - lo] = self.available[rows, a:b] / self.bucket_days
+        return share
+
+    def fit_effort(self, rows, lo: int, amounts: np.ndarray) -> np.ndarray:
+        """
+        Per-column task amounts from column lo as each row would take them, shape (len(rows) or 1, n).
+
+        With a calendar each column's amount is scaled by the share of it
+        the employee is available and the row is scaled back to the same
+        total, so days off get no load and the task's own utilization keeps
+        its effort profile. Without one every row is ``amounts``.
+        """
+        share = self.available_share(rows, lo, len(amounts))
+        if share is None:
+            return amounts.reshape(1, -1)
+        return fit_to_share(amounts, share)
+
+    def span(self, d0: Day, n_days: int) -> Tuple[int, int]:
+        """(first column, number of columns) covering ``n_days`` days from d0."""
+        off = self.offset(d0)
+        lo = off // self.bucket_days
+        return lo, (off + n_days - 1) // self.bucket_days - lo + 1
+
+    def spread(self, d0: Day, amounts: np.ndarray) -> Tuple[int, np.ndarray]:
+        """Sum per-day amounts starting at d0 into per-column amounts: (first column, amounts)."""
+        if self.bucket_days == 1:
+            return self.offset(d0), amounts
+        cols = (self.offset(d0) + np.arange(len(amounts))) // self.bucket_days
+        return int(cols[0]), np.bincount(cols - cols[0], weights=amounts)
+
+    def window(self, emp_id: str, d0: Day, n_days: int) -> np.ndarray:
+        """Copy of an employee's load over the columns covering ``n_days`` days from d0 (zeros outside the horizon)."""
+        lo, n = self.span(d0, n_days)
+        out = np.zeros(n, dtype=float)
+        a, b = max(lo, 0), min(lo + n, self.n_cols)
+        if a < b:
+            out[a - lo:b - lo] = self.load[self.emp_pos[emp_id], a:b]
+        return out
+
+    def windows(self, rows: np.ndarray, d0: Day, n_days: int) -> np.ndarray:
+        """Load for several employee rows at once, shape (len(rows), columns)."""
+        lo, n = self.span(d0, n_days)
+        out = np.zeros((len(rows), n), dtype=float)
+        a, b = max(lo, 0), min(lo + n, self.n_cols)
+        if a < b:
+            out[:, a - lo:b - lo] = self.load[rows, a:b]
+        return out
+
+    def add(self, emp_id: str, d0: Day, amounts: np.ndarray):
+        """Add per-day amounts starting at d0, dropping days outside the horizon."""
+        self.add_columns(emp_id, *self.spread(d0, amounts))
+
+    def add_columns(self, emp_id: str, lo: int, amounts: np.ndarray):
+        """Add per-column amounts starting at column lo, dropping columns outside the horizon."""
+        a, b = max(lo, 0), min(lo + len(amounts), self.n_cols)
+        if a < b:
+            row = self.emp_pos[emp_id]
+            part = amounts[a - lo:b - lo]
+            self.load[row, a:b] += part
+            if not self._tree_stale[row]:
+                if part.min() == part.max():
+                    self.tree.range_add(row, a, b, float(part[0]))
+                else:
+                    self.tree.add_values(row, a, part)
+            self._free_cum.pop(row, None)
+            self.version[row] += 1
+
+    def row_memo(self, row: int) -> dict:
+        """Memo of one employee's window estimates, emptied whenever the row's version changes."""
+        entry = self._row_memo.get(row)
+        if entry is None or entry[0] != self.version[row]:
+            entry = (int(self.version[row]), {})
+            self._row_memo[row] = entry
+        return entry[1]
+
+    def cached_peaks(self, key: tuple, rows: np.ndarray, caps: np.ndarray, compute) -> np.ndarray:
+        """
+        Peak utilization of ``rows`` for one (window, effort, profile) key.
+
+        Only rows whose version or capacity changed since they were cached
+        are passed to ``compute(rows)``. The most recent PEAK_MEMO_WINDOWS
+        keys are kept.
+        """
+        entry = self._peak_memo.get(key)
+        if entry is None:
+            n_emp = len(self.employees)
+            entry = (np.full(n_emp, -1, dtype=np.int64), np.zeros(n_emp), np.zeros(n_emp))
+            self._peak_memo[key] = entry
+            if len(self._peak_memo) > PEAK_MEMO_WINDOWS:
+                self._peak_memo.popitem(last=False)
+        else:
+            self._peak_memo.move_to_end(key)
+        versions, cached_caps, peaks = entry
+        stale = (versions[rows] != self.version[rows]) | (cached_caps[rows] != caps[rows])
+        if stale.any():
+            todo = rows[stale]
+            peaks[todo] = compute(todo)
+            versions[todo] = self.version[todo]
+            cached_caps[todo] = caps[todo]
+        return peaks[rows]
+
+    def window_max(self, rows, d0: Day, n_days: int) -> np.ndarray:
+        """Peak column load over ``n_days`` days from d0 for each row, via the segment tree."""
+        rows = np.atleast_1d(rows)
+        lo, n = self.span(d0, n_days)
+        a, b = max(lo, 0), min(lo + n, self.n_cols)
+        if self.tree is None:
+            self.tree = LoadSegmentTree(len(self.employees), self.n_cols)
+        stale = rows[self._tree_stale[rows]]
+        if len(stale):
+            stale = np.unique(stale)
+            self.tree.load_rows(stale, self.load[stale])
+            self._tree_stale[stale] = False
+        peak = self.tree.range_max(rows, a, b)
+        if a > lo or b < lo + n:
+            peak = np.maximum(peak, 0.0)  # columns outside the horizon carry no load
+        return peak
+
+    def free_cumsum(self, row: int, cap: float) -> np.ndarray:
+        """
+        Prefix sums of free capacity ``max(0, column capacity - load)`` for one row.
+
+        Entry k is the free capacity of the first k horizon columns, so the
+        array has n_cols + 1 entries starting at 0.0. Cached until the row
+        is next written through ``add``.
+        """
+        cached = self._free_cum.get(row)
+        if cached is not None and cached[0] == cap:
+            return cached[1]
+        cum = free_prefix_sums(self.load[row], self.col_capacities([row], 0, self.n_cols, [cap])[0])
+        self._free_cum[row] = (cap, cum)
+        return cum
+
+    def _day_in_column(self, col: int, frac: float, d0: int) -> int:
+        """Day (ordinal) within a column by which ``frac`` of its free capacity is used."""
+        day = self.start_ord + col * self.bucket_days + max(1, math.ceil(frac * self.bucket_days)) - 1
+        return max(d0, day)
+
+    def _cover_unloaded(self, col: int, target: float, col_cap: float, d0: int) -> int:
+        """Cover ``target`` from ``col`` onwards at full capacity (no load outside the horizon)."""
+        n = max(1, math.ceil(target / col_cap))
+        return self._day_in_column(col + n - 1, (target - (n - 1) * col_cap) / col_cap, d0)
+
+    def covered_on(self, emp_id: str, d0: Day, effort: float, cap: float) -> int:
+        """
+        Day ordinal by which the employee's free capacity from d0 onwards adds up to ``effort``.
+
+        Columns outside the horizon have no load, so they contribute their full
+        capacity. In bucketed mode the day within the covering bucket is
+        interpolated from the share of its free capacity that is used.
+        """
+        d0 = day_ordinal(d0)
+        target = effort - 1e-9
+        if target <= 0:
+            return d0
+        col_cap = self.col_capacity(cap)
+        lo = self.column(d0)
+        if lo < 0:
+            if target <= -lo * col_cap:
+                return self._cover_unloaded(lo, target, col_cap, d0)
+            target -= -lo * col_cap
+            lo = 0
+        if lo < self.n_cols:
+            cum = self.free_cumsum(self.emp_pos[emp_id], cap)
+            goal = cum[lo] + target
+            k = int(np.searchsorted(cum, goal, side="left"))
+            if k <= self.n_cols:
+                return self._day_in_column(k - 1, (goal - cum[k - 1]) / (cum[k] - cum[k - 1]), d0)
+            target = goal - cum[self.n_cols]
+            lo = self.n_cols
+        return self._cover_unloaded(lo, target, col_cap, d0)
+
+    def water_fill(self, emp_id: str, d0: Day, effort: float, cap: float) -> Tuple[int, np.ndarray]:
+        """
+        Pour ``effort`` into the employee's free capacity from d0 onwards: (first column, per-column amounts).
+
+        Each column takes ``max(0, column capacity - load)`` until the effort is
+        used up, so the last column is the one holding covered_on(emp_id, d0,
+        effort, cap) and placement agrees with the delay estimate.
+        """
+        lo = self.column(d0)
+        n = self.column(self.covered_on(emp_id, d0, effort, cap)) - lo + 1
+        row = self.emp_pos[emp_id]
+        free = self.col_capacities([row], lo, n, [cap])[0]
+        a, b = max(lo, 0), min(lo + n, self.n_cols)
+        if a < b:
+            free[a - lo:b - lo] = np.maximum(0.0, free[a - lo:b - lo] - self.load[row, a:b])
+        filled = np.minimum(np.cumsum(free), effort)
+        amounts = np.diff(filled, prepend=0.0)
+        amounts[-1] += effort - filled[-1]  # Whatever the 1e-9 cover tolerance left over
+        return lo, amounts
+
+    def peak_util(self, emp_id: str, d0: Day, n_days: int, cap: float) -> float:
+        """Peak load / capacity ratio over the columns covering ``n_days`` days from d0."""
+        if n_days <= 0:
+            return 0.0
+        row = self.emp_pos[emp_id]
+        if self.available is None:
+            return float(self.window_max(row, d0, n_days)[0] / self.col_capacity(cap))
+        lo, n = self.span(d0, n_days)
+        return float((self.windows([row], d0, n_days) / self.col_capacities([row], lo, n, [cap])).max())
+
+
+DailyLoad = Union[Dict[str, Dict[date, float]], LoadMatrix]
+
+
+def _window_len(d0: Day, d1: Day) -> int:
+    """Number of days daterange(d0, d1) would return (dates or day ordinals)."""
+    if d0 is None or d1 is None:
+        return 0
+    return max(0, day_ordinal(d1) - day_ordinal(d0)) + 1
+
+
+# ============================================
+# EFFORT DISTRIBUTION KERNELS
+# ============================================
+
+# Shapes a task's effort can be spread with across its window. Every kernel
+# averages 1.0 per day, so effort * kernel / num_days sums to the effort.
+EFFORT_PROFILES = ("front_loaded", "uniform", "back_loaded", "bell")
+
+_EFFORT_KERNELS: Dict[Tuple[str, int], np.ndarray] = {}
+
+
+def _profile_weights(num_days: int, profile: str) -> list:
+    span = max(1, num_days - 1)
+    if profile == "front_loaded":
+        return [2.0 - (1.5 * i / span) for i in range(num_days)]
+    if profile == "back_loaded":
+        return [0.5 + (1.5 * i / span) for i in range(num_days)]
+    if profile == "uniform":
+        return [1.0] * num_days
+    if profile == "bell":
+        return [0.5 + 1.5 * math.sin(math.pi * (i + 0.5) / num_days) for i in range(num_days)]
+    raise ValueError(f"Unknown effort profile {profile!r}; expected one of {EFFORT_PROFILES}")
+
+
+def effort_kernel(num_days: int, profile: str = "front_loaded") -> np.ndarray:
+    """
+    Cached, read-only per-day weights for spreading effort over ``num_days``.
+
+    - front_loaded: 2.0 falling linearly to 0.5 (the historical default)
+    - back_loaded: 0.5 rising linearly to 2.0
+    - uniform: flat
+    - bell: half-sine peaking mid-window
+    """
+    key = (profile, num_days)
+    kernel = _EFFORT_KERNELS.get(key)
+    if kernel is None:
+        weights = _profile_weights(num_days, profile)
+        total_weight = sum(weights)
+        if total_weight > 0:
+            weights = [w * num_days / total_weight for w in weights]
+        kernel = np.array(weights, dtype=float)
+        kernel.setflags(write=False)
+        _EFFORT_KERNELS[key] = kernel
+    return kernel
+
+
 # ============================================
 # CAPACITY & LOAD MANAGEMENT
 # ============================================
 
 def window_peak_util(
     emp_id: str,
-    d0: date,
-    d1: date,
-    daily_load: Dict[str, Dict[date, float]],
+    d0: Day,
+    d1: Day,
+    daily_load: DailyLoad,
     emp_fte: Dict[str, float],
 ) -> float:
     """Calculate peak utilization for an employee during a time window."""
-    days = daterange(d0, d1)
-    if not days:
-        return 0.0
     cap = float(emp_fte.get(emp_id, 1.0))
     if cap <= 0:
         cap = 0.01
+    if isinstance(daily_load, LoadMatrix):
+        return daily_load.peak_util(emp_id, d0, _window_len(d0, d1), cap)
+    days = daterange(d0, d1)
+    if not days:
+        return 0.0
     return max((daily_load[emp_id].get(d, 0.0) / cap) for d in days)
 
 
 def has_capacity_for_task(
     emp_id: str,
-    d0: date,
-    d1: date,
+    d0: Day,
+    d1: Day,
     total_effort: float,
-    daily_load: Dict[str, Dict[date, float]],
+    daily_load: DailyLoad,
     emp_fte: Dict[str, float],
     max_utilization: float = 1.0,
+    profile: str = "front_loaded",
 ) -> Tuple[bool, float]:
     """
     Check if employee has capacity for a task BEFORE assignment.
 
     Returns (has_capacity, estimated_peak_util).
     """
-    days = daterange(d0, d1)
-    if not days:
+    num_days = _window_len(d0, d1)
+    if num_days == 0:
         return False, 0.0
 
     cap = float(emp_fte.get(emp_id, 1.0))
     if cap <= 0:
         cap = 0.01
 
-    num_days = len(days)
-    weights = [2.0 - (1.5 * i / max(1, num_days - 1)) for i in range(num_days)]
-    total_weight = sum(weights)
-    if total_weight > 0:
-        weights = [w * num_days / total_weight for w in weights]
+    if isinstance(daily_load, LoadMatrix):
+        _, peaks = batch_has_capacity_for_task(
+            [daily_load.emp_pos[emp_id]], d0, d1, total_effort, daily_load,
+            np.full(len(daily_load.employees), cap), max_utilization, profile,
+        )
+        peak_util = float(peaks[0])
+        return peak_util <= max_utilization, peak_util
 
+    weights = effort_kernel(num_days, profile)
+    days = daterange(d0, d1)
     peak_util = 0.0
     for i, d in enumerate(days):
         current_load = daily_load[emp_id].get(d, 0.0)
@@ -147,14 +1069,152 @@ def has_capacity_for_task(
     return peak_util <= max_utilization, peak_util
 
 
+def capacity_vector(employees: list, emp_fte: Dict[str, float]) -> np.ndarray:
+    """Per-employee capacity aligned with ``employees``, floored like the scalar functions."""
+    caps = np.array([float(emp_fte.get(e, 1.0)) for e in employees], dtype=float)
+    caps[caps <= 0] = 0.01
+    return caps
+
+
+def batch_has_capacity_for_task(
+    emp_rows: np.ndarray,
+    d0: Day,
+    d1: Day,
+    total_effort: float,
+    load: LoadMatrix,
+    caps: np.ndarray,
+    max_utilization: float = 1.0,
+    profile: str = "front_loaded",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized has_capacity_for_task over many employees.
+
+    - emp_rows: employee row indices into ``load``
+    - caps: capacity_vector(load.employees, emp_fte)
+
+    Returns (has_capacity, estimated_peak_util), one entry per row. Peaks
+    are memoized per employee and only recomputed after that employee's
+    load changes.
+    """
+    emp_rows = np.asarray(emp_rows, dtype=int)
+    num_days = _window_len(d0, d1)
+    if num_days == 0 or len(emp_rows) == 0:
+        return np.zeros(len(emp_rows), dtype=bool), np.zeros(len(emp_rows), dtype=float)
+    additional = total_effort * effort_kernel(num_days, profile) / num_days
+
+    def compute(rows):
+        if profile == "uniform" and load.bucket_days == 1 and load.available is None:
+            return (load.window_max(rows, d0, num_days) + additional[0]) / load.col_capacity(caps[rows])
+        lo, spread = load.spread(d0, additional)
+        adds = load.fit_effort(rows, lo, spread)
+        return window_peaks(load.load, rows, lo, adds, load.col_capacities(rows, lo, len(spread), caps[rows]))
+
+    peak_util = load.cached_peaks((day_ordinal(d0), num_days, total_effort, profile), emp_rows, caps, compute)
+    return peak_util <= max_utilization, peak_util
+
+
+def earliest_feasible_start(
+    emp_rows: np.ndarray,
+    d0: Day,
+    d1: Day,
+    total_effort: float,
+    load: LoadMatrix,
+    caps: np.ndarray,
+    max_utilization: float = 1.0,
+    profile: str = "front_loaded",
+    max_shift_days: Optional[int] = None,
+) -> Optional[Tuple[int, Day, int]]:
+    """
+    Earliest shift of the task window at which one of ``emp_rows`` has capacity.
+
+    Returns (employee_row, earliest_start, delay_days) for the smallest shift,
+    ties going to the earlier row in ``emp_rows``; None when the task can never
+    fit under ``max_utilization`` (its own peak exceeds it even with no load
+    and full availability) or does not fit within ``max_shift_days``. The
+    window moves in whole columns, so in bucketed mode delays are multiples
+    of ``bucket_days``.
+    earliest_start is a date or a day ordinal, matching d0.
+
+    Shifts are pruned with the free-capacity prefix sums: a shift can only fit
+    if the free capacity under the cap over its window covers the effort. The
+    surviving shifts get the exact has-capacity check, earliest first.
+    """
+    num_days = _window_len(d0, d1)
+    if num_days == 0:
+        return None
+    _, additional = load.spread(d0, total_effort * effort_kernel(num_days, profile) / num_days)
+    m = len(additional)
+    need = float(additional.sum())
+    lo = load.column(d0)
+    horizon_end = max(0, load.n_cols - lo)  # from this shift on the window sees no load
+    if max_shift_days is not None:
+        if max_shift_days < 0:
+            return None
+        horizon_end = min(horizon_end, max_shift_days // load.bucket_days)
+
+    best = None
+    for row in np.asarray(emp_rows, dtype=int):
+        col_cap = load.col_capacity(caps[row])
+        if not (additional / col_cap).max() <= max_utilization:
+            continue
+        last = horizon_end if best is None else min(horizon_end, best[0] - 1)
+        if last < 0:
+            continue
+        shifts = np.arange(last + 1)
+        a = np.clip(lo + shifts, 0, load.n_cols)
+        b = np.clip(lo + shifts + m, 0, load.n_cols)
+        cum = load.free_cumsum(row, caps[row] * max_utilization)
+        free = cum[b] - cum[a] + (m - (b - a)) * col_cap * max_utilization
+        shifts = shifts[free >= need - 1e-9 * max(1.0, need)]
+        if len(shifts) == 0:
+            continue
+        # Row padded with zeros so every shifted window is a plain slice
+        first = lo + int(shifts[0])
+        padded = np.zeros(int(shifts[-1] - shifts[0]) + m, dtype=float)
+        a, b = max(first, 0), min(first + len(padded), load.n_cols)
+        if a < b:
+            padded[a - first:b - first] = load.load[row, a:b]
+        padded_caps = load.col_capacities([row], first, len(padded), caps[[row]])[0]
+        share = load.available_share([row], first, len(padded))
+        if share is None:
+            adds = additional.reshape(1, -1)
+        else:
+            # Every shifted window reweights the effort by the availability it covers
+            adds = fit_to_share(additional, np.lib.stride_tricks.sliding_window_view(share[0], m)[shifts - shifts[0]])
+        hit = first_fitting_window(padded, shifts - shifts[0], adds, padded_caps, max_utilization)
+        if hit >= 0:
+            shift = int(shifts[hit])
+            if best is None or shift < best[0]:
+                best = (shift, int(row))
+        if best is not None and best[0] == 0:
+            break
+    if best is None:
+        return None
+    delay = best[0] * load.bucket_days
+    return best[1], add_days(d0, delay), delay
+
+
 def add_task_load(
     emp_id: str,
-    d0: date,
-    d1: date,
+    d0: Day,
+    d1: Day,
     total_effort: float,
-    daily_load: Dict[str, Dict[date, float]],
+    daily_load: DailyLoad,
+    profile: str = "front_loaded",
 ):
-    """Add task load to employee's daily schedule with front-loaded distribution."""
+    """
+    Add task load to employee's daily schedule, spread by an effort_kernel profile (front-loaded by default).
+
+    On a LoadMatrix with an availability calendar the profile is reweighted
+    by the employee's availability (LoadMatrix.fit_effort).
+    """
+    if isinstance(daily_load, LoadMatrix):
+        num_days = _window_len(d0, d1)
+        if num_days:
+            lo, amounts = daily_load.spread(d0, total_effort * effort_kernel(num_days, profile) / num_days)
+            daily_load.add_columns(emp_id, lo, daily_load.fit_effort([daily_load.emp_pos[emp_id]], lo, amounts)[0])
+        return
+
     days = daterange(d0, d1)
     if not days:
         return
@@ -163,28 +1223,115 @@ def add_task_load(
     if num_days == 0:
         return
 
-    weights = [2.0 - (1.5 * i / max(1, num_days - 1)) for i in range(num_days)]
-    total_weight = sum(weights)
-    if total_weight > 0:
-        weights = [w * num_days / total_weight for w in weights]
+    weights = effort_kernel(num_days, profile)
 
     for i, d in enumerate(days):
         if d in daily_load[emp_id]:
             daily_load[emp_id][d] += total_effort * weights[i] / num_days
 
 
+# How a task's effort is laid onto the assignee's load: "profile" spreads it over the
+# task window with its effort_kernel; "water_fill" pours it into free capacity from
+# the start date, spilling past the end date only when the window is full.
+PLACEMENT_MODES = ("profile", "water_fill")
+
+
+def batch_water_fill_capacity(
+    emp_rows: np.ndarray,
+    d0: Day,
+    d1: Day,
+    total_effort: float,
+    load: LoadMatrix,
+    caps: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Water-filling counterpart of batch_has_capacity_for_task.
+
+    Returns (fits, peak_util) per row: whether the free capacity between d0
+    and d1 covers the effort (i.e. estimate_delay_days would be 0, up to the
+    1e-9 cover tolerance), and the peak utilization over that window once
+    the effort is poured in (so at most 1.0 where the load was under capacity).
+    """
+    emp_rows = np.asarray(emp_rows, dtype=int)
+    num_days = _window_len(d0, d1)
+    if num_days == 0 or len(emp_rows) == 0:
+        return np.zeros(len(emp_rows), dtype=bool), np.zeros(len(emp_rows), dtype=float)
+    col_caps = load.col_capacities(emp_rows, *load.span(d0, num_days), caps[emp_rows])
+    window = load.windows(emp_rows, d0, num_days)
+    filled = np.minimum(np.cumsum(np.maximum(0.0, col_caps - window), axis=1), total_effort)
+    fill = np.diff(filled, axis=1, prepend=0.0)
+    fits = filled[:, -1] >= total_effort - 1e-9
+    if load.bucket_days > 1:
+        # The last bucket can run past d1, so check the covering day itself like estimate_delay_days
+        last = max(day_ordinal(d0), day_ordinal(d1))
+        for i in np.flatnonzero(fits):
+            fits[i] = load.covered_on(load.employees[emp_rows[i]], d0, total_effort, caps[emp_rows[i]]) <= last
+    return fits, ((window + fill) / col_caps).max(axis=1)
+
+
+def water_fill_peak_util(
+    emp_id: str,
+    d0: Day,
+    total_effort: float,
+    load: LoadMatrix,
+    emp_fte: Dict[str, float],
+) -> float:
+    """Peak utilization over the columns a water-filled task would occupy, including any spill past its end."""
+    cap = float(emp_fte.get(emp_id, 1.0))
+    if cap <= 0:
+        cap = 0.01
+    lo, amounts = load.water_fill(emp_id, d0, total_effort, cap)
+    window = np.zeros(len(amounts), dtype=float)
+    a, b = max(lo, 0), min(lo + len(amounts), load.n_cols)
+    if a < b:
+        window[a - lo:b - lo] = load.load[load.emp_pos[emp_id], a:b]
+    return float(((window + amounts) / load.col_capacities([load.emp_pos[emp_id]], lo, len(amounts), [cap])[0]).max())
+
+
+def water_fill_task_load(
+    emp_id: str,
+    d0: Day,
+    total_effort: float,
+    load: LoadMatrix,
+    emp_fte: Dict[str, float],
+) -> int:
+    """Add task load by pouring it into the employee's free capacity from d0; returns the finish day ordinal."""
+    cap = float(emp_fte.get(emp_id, 1.0))
+    if cap <= 0:
+        cap = 0.01
+    finish = load.covered_on(emp_id, d0, total_effort, cap)
+    lo, amounts = load.water_fill(emp_id, d0, total_effort, cap)
+    load.add_columns(emp_id, lo, amounts)
+    return finish
+
+
 def estimate_delay_days(
     emp_id: str,
-    d0: date,
-    d1: date,
+    d0: Day,
+    d1: Day,
     total_effort: float,
-    daily_load: Dict[str, Dict[date, float]],
+    daily_load: DailyLoad,
     emp_fte: Dict[str, float],
 ) -> int:
-    """Estimate how many days past d1 the task would be delayed."""
+    """
+    Estimate how many days past d1 the task would be delayed.
+
+    Effort fills the employee's free capacity (cap - load) day by day from d0;
+    the delay is how far past d1 the effort is fully covered. There is no
+    upper limit on the delay returned.
+    """
     cap = float(emp_fte.get(emp_id, 1.0))
     if cap <= 0:
         cap = 0.01
+    if isinstance(daily_load, LoadMatrix):
+        if d0 is None or d1 is None:
+            return 0
+        d0, d1 = day_ordinal(d0), day_ordinal(d1)
+        memo = daily_load.row_memo(daily_load.emp_pos[emp_id])
+        key = ("delay", d0, d1, total_effort, cap)
+        if key not in memo:
+            memo[key] = max(0, daily_load.covered_on(emp_id, d0, total_effort, cap) - max(d0, d1))
+        return memo[key]
     days = daterange(d0, d1)
     if not days:
         return 0
@@ -198,7 +1345,7 @@ def estimate_delay_days(
             return 0
     delay = 0
     cur = d1 + timedelta(days=1)
-    for _ in range(365):
+    while True:
         used = daily_load[emp_id].get(cur, 0.0)
         avail = max(0.0, cap - used)
         take = min(avail, remaining_effort)
@@ -207,7 +1354,6 @@ def estimate_delay_days(
         if remaining_effort <= 1e-9:
             return delay
         cur = cur + timedelta(days=1)
-    return delay
 
 
 # ============================================
@@ -300,3 +1446,1052 @@ def has_minimum_skill_coverage(
     if total_w <= 0:
         return True
     return (matched_w / total_w) >= min_coverage
+
+
+# ============================================
+# BATCH SKILL MATCHING
+# ============================================
+
+def employee_key(v) -> str:
+    """
+    Canonical string form of an employee id ("" when blank).
+
+    Excel gives numeric ids as floats once a column has blanks (101.0), so
+    integral floats are written without the decimal part; everything else
+    is str() and stripped. Every employee id and assignee goes through this.
+    """
+    if v is None or pd.isna(v):
+        return ""
+    if isinstance(v, (float, np.floating)) and float(v).is_integer():
+        return str(int(v))
+    return str(v).strip()
+
+
+class SkillIndex:
+    """
+    Employee x skill lookup built once from ``people_raw``.
+
+    - proficiency: float matrix of ``proficiency_output`` (0.0 where absent)
+    - present: boolean mask of which (employee, skill) pairs exist
+
+    Rows follow ``employees`` (sorted employee ids), columns follow ``skills``.
+    Duplicate (employee, skill) rows keep the first occurrence, matching the
+    ``prow.iloc[0]`` lookups of the per-employee functions.
+    """
+
+    def __init__(self, employees: list, skills: list, proficiency: np.ndarray, present: np.ndarray):
+        self.employees = list(employees)
+        self.skills = list(skills)
+        self.emp_pos = {e: i for i, e in enumerate(self.employees)}
+        self.skill_pos = {s: j for j, s in enumerate(self.skills)}
+        self.proficiency = proficiency
+        self.present = present
+
+    @classmethod
+    def from_people(cls, people_raw: pd.DataFrame) -> "SkillIndex":
+        rows = pd.DataFrame({
+            "employee_id": people_raw["employee_id"].map(employee_key),
+            "skill": people_raw["skill"].astype(str),
+            "proficiency_output": people_raw["proficiency_output"].astype(float),
+        }).drop_duplicates(subset=["employee_id", "skill"], keep="first")
+
+        employees = sorted(rows["employee_id"].unique().tolist())
+        skills = sorted(rows["skill"].unique().tolist())
+        emp_codes = pd.Categorical(rows["employee_id"], categories=employees).codes
+        skill_codes = pd.Categorical(rows["skill"], categories=skills).codes
+
+        proficiency = np.zeros((len(employees), len(skills)), dtype=float)
+        present = np.zeros((len(employees), len(skills)), dtype=bool)
+        proficiency[emp_codes, skill_codes] = rows["proficiency_output"].to_numpy()
+        present[emp_codes, skill_codes] = True
+        return cls(employees, skills, proficiency, present)
+
+    def resolve(self, skills_req: list) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Turn a list of {"skill", "skill_importance"} dicts into (skill_ids, importance).
+
+        Skills nobody has get id -1.
+        """
+        ids = np.array(
+            [self.skill_pos.get(str(s["skill"]).strip(), -1) for s in skills_req], dtype=np.int64
+        )
+        imp = np.array([float(s["skill_importance"]) for s in skills_req], dtype=float)
+        return ids, imp
+
+    def lookup(self, skills_req) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Gather the columns for a task's requirements.
+
+        ``skills_req`` is either a list of {"skill", "skill_importance"} dicts or
+        an already resolved (skill_ids, importance) pair, e.g. from
+        TaskTable.requirements. Returns (proficiency, present, importance) where
+        the first two are (employees x requirements) and importance is one value
+        per requirement. Skills nobody has (ids outside ``skills``) come back as
+        all-absent columns.
+        """
+        if isinstance(skills_req, tuple):
+            ids, imp = skills_req
+        else:
+            ids, imp = self.resolve(skills_req)
+        n_emp = len(self.employees)
+        known = (ids >= 0) & (ids < len(self.skills))
+        prof = np.zeros((n_emp, len(ids)), dtype=float)
+        pres = np.zeros((n_emp, len(ids)), dtype=bool)
+        prof[:, known] = self.proficiency[:, ids[known]]
+        pres[:, known] = self.present[:, ids[known]]
+        return prof, pres, imp
+
+
+def batch_person_allocated_skill_total(skills_req: list, skill_index: SkillIndex) -> np.ndarray:
+    """Vectorized person_allocated_skill_total over every employee in the index."""
+    prof, pres, imp = skill_index.lookup(skills_req)
+    allocated = np.zeros(len(skill_index.employees), dtype=float)
+    for k in range(len(imp)):
+        allocated += np.where(pres[:, k], prof[:, k] * imp[k], 0.0)
+    return allocated
+
+
+def batch_coverage_missing_and_risk(
+    skills_req: list, skill_index: SkillIndex
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized coverage_missing_and_risk.
+
+    Returns (missing_mask, coverage_risk_0_100): missing_mask is
+    (employees x requirements), in the same order as ``skills_req``.
+    """
+    _, pres, imp = skill_index.lookup(skills_req)
+    missing = ~pres
+    total_w = imp.sum()
+    if total_w <= 0:
+        return missing, np.zeros(len(skill_index.employees), dtype=float)
+    missing_w = np.where(missing, imp, 0.0).sum(axis=1)
+    return missing, np.clip(missing_w / total_w, 0.0, 1.0) * 100.0
+
+
+def batch_has_mandatory_skills(
+    skills_req: list, mandatory_threshold: int, skill_index: SkillIndex
+) -> np.ndarray:
+    """Vectorized has_mandatory_skills: True where an employee has every skill with importance >= threshold."""
+    _, pres, imp = skill_index.lookup(skills_req)
+    mandatory = imp >= mandatory_threshold
+    return pres[:, mandatory].all(axis=1)
+
+
+def batch_has_minimum_skill_coverage(
+    skills_req: list, skill_index: SkillIndex, min_coverage: float = 0.01
+) -> np.ndarray:
+    """Vectorized has_minimum_skill_coverage over every employee in the index."""
+    n_emp = len(skill_index.employees)
+    if not skills_req:
+        return np.ones(n_emp, dtype=bool)
+    _, pres, imp = skill_index.lookup(skills_req)
+    total_w = imp.sum()
+    if total_w <= 0:
+        return np.ones(n_emp, dtype=bool)
+    matched_w = np.where(pres, imp, 0.0).sum(axis=1)
+    return (matched_w / total_w) >= min_coverage
+
+
+def skill_shortlist_tiers(skill_scores: np.ndarray, k: int) -> List[np.ndarray]:
+    """
+    Split candidate positions into shortlist tiers by descending skill score.
+
+    Tier 0 is the top ``k``; each later tier widens the shortlist to twice its
+    size (next k, next 2k, next 4k, ...). Ties keep candidate order. With
+    ``k <= 0`` everything is a single tier.
+    """
+    n = len(skill_scores)
+    if k <= 0 or n <= k:
+        return [np.arange(n)]
+    order = np.argsort(-np.asarray(skill_scores, dtype=float), kind="stable")
+    tiers = []
+    start, size = 0, k
+    while start < n:
+        tiers.append(order[start:start + size])
+        start += size
+        size = start
+    return tiers
+
+
+# ============================================
+# TASK RECORDS
+# ============================================
+
+class TaskTable:
+    """
+    Column-oriented task records for the assignment loop.
+
+    One array (or list, for labels passed through to the output) per field,
+    in allocation order, so the loop reads plain values by position instead of
+    building a pandas row per task. Start and end are day ordinals, and
+    ``assignee`` is the task's current assignee from the file ("" if none).
+    Skill requirements are stored CSR style: task i owns
+    ``skill_ids[skill_ptr[i]:skill_ptr[i + 1]]`` and the matching
+    ``skill_importance`` slice. Ids index ``skill_names``, which starts with
+    ``skill_index.skills``; skills nobody has are appended after them.
+    """
+
+    __slots__ = (
+        "task_id", "task_name", "department", "priority", "phase", "work_size",
+        "effort", "required_total", "start", "end", "profile", "excel_order", "assignee",
+        "skill_ptr", "skill_ids", "skill_importance", "skill_names",
+    )
+
+    @classmethod
+    def from_frame(cls, tasks_df: pd.DataFrame, skill_index: SkillIndex) -> "TaskTable":
+        """Build from the sorted task frame (one row per task, ``skills`` as lists of dicts)."""
+        table = cls()
+        n = len(tasks_df)
+
+        def column(name, default):
+            return tasks_df[name].tolist() if name in tasks_df.columns else [default] * n
+
+        table.task_id = column("task_id", "")
+        table.task_name = column("task_name", "")
+        table.department = column("department", "")
+        table.priority = column("priority", "")
+        table.phase = [str(p) for p in column("phase", "Uncategorized")]
+        table.work_size = column("work_size", "")
+        table.effort = tasks_df["work_size_num"].to_numpy(dtype=float)
+        table.required_total = tasks_df["required_total"].to_numpy(dtype=float)
+        table.start = day_ordinals(tasks_df["start_date"])
+        table.end = day_ordinals(tasks_df["end_date"])
+        table.profile = column("effort_profile", "front_loaded")
+        table.excel_order = column("_excel_order", 0)
+        table.assignee = [employee_key(a) for a in column("assignee", "")]
+
+        skills = column("skills", [])
+        table.skill_ptr = np.zeros(n + 1, dtype=np.int64)
+        table.skill_ptr[1:] = np.cumsum([len(reqs) for reqs in skills])
+        table.skill_ids = np.empty(int(table.skill_ptr[-1]), dtype=np.int64)
+        table.skill_importance = np.empty(int(table.skill_ptr[-1]), dtype=float)
+        table.skill_names = list(skill_index.skills)
+        unknown = {}
+        j = 0
+        for reqs in skills:
+            for s in reqs:
+                name = str(s["skill"]).strip()
+                sid = skill_index.skill_pos.get(name)
+                if sid is None:
+                    sid = unknown.get(name)
+                    if sid is None:
+                        sid = unknown[name] = len(table.skill_names)
+                        table.skill_names.append(name)
+                table.skill_ids[j] = sid
+                table.skill_importance[j] = float(s["skill_importance"])
+                j += 1
+        return table
+
+    def __len__(self) -> int:
+        return len(self.task_id)
+
+    def requirements(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(skill_ids, importance) for task i, accepted anywhere a skills_req list is."""
+        lo, hi = self.skill_ptr[i], self.skill_ptr[i + 1]
+        return self.skill_ids[lo:hi], self.skill_importance[lo:hi]
+
+    def skill_names_of(self, i: int) -> list:
+        """Names of task i's required skills, in requirement order."""
+        lo, hi = self.skill_ptr[i], self.skill_ptr[i + 1]
+        return [self.skill_names[sid] for sid in self.skill_ids[lo:hi]]
+
+    def missing_names(self, i: int, missing_row: np.ndarray) -> list:
+        """Turn one employee's row of task i's missing_mask back into skill names."""
+        return [name for name, m in zip(self.skill_names_of(i), missing_row) if m]
+
+
+# ============================================
+# CANDIDATE ELIGIBILITY
+# ============================================
+
+# Skill importance runs 1-5, so these are the only distinct mandatory
+# thresholds the "Skill Match Strictness" slider can produce.
+MANDATORY_THRESHOLDS = (1, 2, 3, 4, 5)
+
+
+class EligibilityMatrix:
+    """
+    Packed task x employee eligibility bitmap.
+
+    Bit (t, e) is set when employee e has every mandatory skill of task t
+    (importance >= mandatory_threshold) and at least minimum skill coverage,
+    i.e. when both has_mandatory_skills and has_minimum_skill_coverage pass.
+    Columns follow ``skill_index.employees``.
+    """
+
+    def __init__(self, task_ids: list, n_employees: int, bits: np.ndarray, mandatory_threshold: int):
+        self.task_ids = [str(t) for t in task_ids]
+        self.task_pos = {t: i for i, t in enumerate(self.task_ids)}
+        self.n_employees = n_employees
+        self.bits = bits
+        self.mandatory_threshold = mandatory_threshold
+
+    @classmethod
+    def build(
+        cls,
+        task_ids: list,
+        task_skills: list,
+        skill_index: SkillIndex,
+        mandatory_threshold: int,
+        min_coverage: float = 0.01,
+    ) -> "EligibilityMatrix":
+        return cls.build_all(
+            task_ids, task_skills, skill_index, (mandatory_threshold,), min_coverage
+        )[mandatory_threshold]
+
+    @classmethod
+    def build_all(
+        cls,
+        task_ids: list,
+        task_skills: list,
+        skill_index: SkillIndex,
+        thresholds: tuple = MANDATORY_THRESHOLDS,
+        min_coverage: float = 0.01,
+    ) -> Dict[int, "EligibilityMatrix"]:
+        """
+        Build one matrix per mandatory threshold in a single pass over the tasks.
+
+        Each task's skill columns are gathered once; coverage is threshold
+        independent and only the mandatory mask is re-evaluated per threshold.
+        """
+        n_emp = len(skill_index.employees)
+        # Rows are packed as they are computed so peak memory stays at the packed size
+        packed = np.zeros((len(thresholds), len(task_skills), (n_emp + 7) // 8), dtype=np.uint8)
+        for i, skills_req in enumerate(task_skills):
+            _, pres, imp = skill_index.lookup(skills_req)
+            total_w = imp.sum()
+            if not skills_req or total_w <= 0:
+                covered = np.ones(n_emp, dtype=bool)
+            else:
+                covered = (np.where(pres, imp, 0.0).sum(axis=1) / total_w) >= min_coverage
+            for k, threshold in enumerate(thresholds):
+                packed[k, i] = np.packbits(pres[:, imp >= threshold].all(axis=1) & covered)
+        return {
+            threshold: cls(task_ids, n_emp, packed[k], threshold)
+            for k, threshold in enumerate(thresholds)
+        }
+
+    def row(self, task_id: str) -> np.ndarray:
+        """Boolean eligibility mask over all employees for one task."""
+        packed = self.bits[self.task_pos[str(task_id)]]
+        return np.unpackbits(packed, count=self.n_employees).astype(bool)
+
+    def eligible(self, task_id: str) -> np.ndarray:
+        """Indices (into skill_index.employees) of the employees eligible for a task."""
+        return np.flatnonzero(self.row(task_id))
+
+    def counts(self) -> np.ndarray:
+        """Number of eligible employees per task."""
+        return np.unpackbits(self.bits, axis=1, count=self.n_employees).sum(axis=1)
+
+    def components(self) -> np.ndarray:
+        """
+        Connected-component label per task of the task <-> eligible-employee graph.
+
+        Tasks with different labels share no eligible employee, directly or
+        through other tasks, so they never compete for the same load. Labels
+        are small ints numbered in task order; tasks with nobody eligible each
+        get a component of their own.
+        """
+        dense = np.unpackbits(self.bits, axis=1, count=self.n_employees).astype(bool)
+        task_of, emp_of = np.nonzero(dense)
+        starts = np.flatnonzero(np.r_[True, task_of[1:] != task_of[:-1]]) if len(task_of) else task_of
+        # Union-find over employees by min-label hooking and pointer jumping
+        parent = np.arange(self.n_employees)
+        while len(task_of):
+            roots = parent[emp_of]
+            task_min = np.minimum.reduceat(roots, starts)
+            hooked = np.repeat(task_min, np.diff(np.r_[starts, len(roots)]))
+            if np.array_equal(roots, hooked):
+                break
+            np.minimum.at(parent, roots, hooked)
+            while True:
+                jumped = parent[parent]
+                if np.array_equal(jumped, parent):
+                    break
+                parent = jumped
+        root = np.full(len(self.task_ids), -1, dtype=np.int64)
+        if len(task_of):
+            root[task_of[starts]] = parent[emp_of[starts]]
+        lonely = root < 0
+        root[lonely] = self.n_employees + np.flatnonzero(lonely)
+        _, first, labels = np.unique(root, return_index=True, return_inverse=True)
+        # Renumber so components appear in task order
+        order = np.argsort(first, kind="stable")
+        relabel = np.empty_like(order)
+        relabel[order] = np.arange(len(order))
+        return relabel[labels]
+
+
+class DepartmentIndex:
+    """
+    Department -> employee membership for the same-department-first ordering.
+
+    ``members`` is a (departments x employees) boolean matrix whose columns
+    follow ``skill_index.employees``; an employee listed under several
+    departments in ``people_raw`` belongs to each of them.
+    """
+
+    def __init__(self, departments: list, members: np.ndarray):
+        self.departments = list(departments)
+        self.dept_pos = {d: i for i, d in enumerate(self.departments)}
+        self.members = members
+
+    @classmethod
+    def from_people(cls, people_raw: pd.DataFrame, skill_index: SkillIndex) -> "DepartmentIndex":
+        pairs = pd.DataFrame({
+            "department": people_raw["department"].astype(str),
+            "employee_id": people_raw["employee_id"].map(employee_key),
+        }).drop_duplicates()
+        departments = sorted(pairs["department"].unique().tolist())
+        members = np.zeros((len(departments), len(skill_index.employees)), dtype=bool)
+        dept_codes = pd.Categorical(pairs["department"], categories=departments).codes
+        emp_codes = pd.Categorical(pairs["employee_id"], categories=skill_index.employees).codes
+        known = emp_codes >= 0
+        members[dept_codes[known], emp_codes[known]] = True
+        return cls(departments, members)
+
+    def rank(self, department: str, emp_pos: int) -> int:
+        """0 when the employee belongs to the department, 1 otherwise."""
+        d = self.dept_pos.get(str(department))
+        return 0 if d is not None and self.members[d, emp_pos] else 1
+
+    def order_candidates(self, candidate_idx: np.ndarray, department: str) -> np.ndarray:
+        """Stable reorder of employee indices putting the department's members first."""
+        d = self.dept_pos.get(str(department))
+        if d is None:
+            return candidate_idx
+        in_team = self.members[d, candidate_idx]
+        return np.concatenate([candidate_idx[in_team], candidate_idx[~in_team]])
+
+
+# ============================================
+# ALLOCATION
+# ============================================
+
+def allocate_tasks(
+    task_table: TaskTable,
+    skill_index: SkillIndex,
+    eligibility: EligibilityMatrix,
+    emp_fte: Dict[str, float],
+    department_index: Optional[DepartmentIndex] = None,
+    team_first: bool = True,
+    bucket_days: int = 1,
+    shift_to_fit: bool = False,
+    max_start_slack: int = 14,
+    shortlist_k: int = 0,
+    positions: Optional[np.ndarray] = None,
+    as_of: Optional[Day] = None,
+    current_assignees: Optional[list] = None,
+    placement: str = "profile",
+    availability: Optional[AvailabilityCalendar] = None,
+    business_days: Optional[BusinessDays] = None,
+) -> Tuple[list, dict]:
+    """
+    Greedy assignment of tasks, in TaskTable order, to the lowest-risk eligible employee.
+
+    - positions: TaskTable rows to allocate (default all, in order). The load
+      horizon always spans the whole table, so a subset allocates exactly as
+      it would in a full run in which the other tasks touch other employees.
+    - as_of: rolling-horizon mode. Tasks that started before this day keep
+      their current assignee (``current_assignees``, default
+      ``task_table.assignee``) and are not re-allocated; the remaining load of
+      those still in flight is placed first. Tasks that ended before it are
+      frozen too, unassigned if they had nobody. In-flight tasks without an
+      assignee and all later tasks go through the greedy loop, and the load
+      horizon starts at as_of. An in-flight task's window is cut to start at
+      as_of, keeping its full effort.
+    - placement: one of PLACEMENT_MODES. With "water_fill" an employee has
+      capacity when their free capacity within the task window covers the
+      effort; with shift_to_fit, instead of moving the start, the effort may
+      spill up to ``max_start_slack`` days past the end date.
+    - availability: per-employee calendar; capacity on each day is fte times
+      the employee's availability that day.
+    - business_days: plan on a business-day axis. Task dates and as_of are
+      mapped to business-day indices (a start on a day off moves to the next
+      business day, an end to the previous one), so weekends and holidays
+      carry no capacity and slack and delays count business days. Planned
+      dates are mapped back to calendar dates.
+
+    Returns (assignments, stats): one output row dict per allocated task,
+    the shortlist counters ``shortlist_widenings`` / ``shortlist_widened_tasks``
+    and ``unrostered_assignees``, the (task_id, assignee) pairs of pinned
+    tasks whose assignee is not in the roster, so their load is not counted.
+    """
+    employees = skill_index.employees
+    if positions is None:
+        positions = range(len(task_table))
+    max_start_slack = int(max_start_slack)
+    shortlist_k = int(shortlist_k)
+    frozen = np.zeros(len(task_table), dtype=bool)
+    starts, ends, axis_date = task_table.start, task_table.end, ordinal_date
+    if business_days is not None:
+        starts = business_days.start_index(task_table.start)
+        ends = np.maximum(business_days.end_index(task_table.end), starts)
+        axis_date = business_days.date
+        bucket_days = business_days.bucket_days(bucket_days)
+    horizon = (int(starts.min()), int(ends.max()))
+    if as_of is not None:
+        as_of = day_ordinal(as_of)
+        if business_days is not None:
+            as_of = int(business_days.start_index(as_of))
+        if current_assignees is None:
+            current_assignees = task_table.assignee
+        has_assignee = np.array([bool(a) and a != "UNASSIGNED" for a in current_assignees], dtype=bool)
+        live = ends >= as_of
+        frozen = (starts < as_of) & (has_assignee | ~live)
+        # Only the active window is tracked; earlier load can no longer affect anything
+        horizon = (max(as_of, horizon[0]), int(ends[live].max()) if live.any() else as_of)
+    load = LoadMatrix(employees, horizon[0], horizon[1], bucket_days=bucket_days,
+                      availability=availability, business_days=business_days)
+    emp_caps = capacity_vector(employees, emp_fte)
+    # Remaining load of in-flight tasks goes in before anything is allocated (days before as_of fall outside the horizon)
+    # (assignees missing from the roster have no row; they come back in stats["unrostered_assignees"])
+    for ti in np.flatnonzero(frozen & (ends >= horizon[0])):
+        if current_assignees[ti] in load.emp_pos:
+            add_task_load(current_assignees[ti], int(starts[ti]), int(ends[ti]),
+                          float(task_table.effort[ti]), load, profile=task_table.profile[ti])
+
+    assignments = []
+    shortlist_widenings = 0  # Extra shortlist tiers evaluated across all tasks
+    shortlist_widened_tasks = 0  # Tasks whose first shortlist had nobody with capacity
+    for ti in positions:
+        tid = task_table.task_id[ti]
+        skills_req = task_table.requirements(ti)
+        required_total = float(task_table.required_total[ti])
+        effort = float(task_table.effort[ti])
+        d0 = int(starts[ti])
+        d1 = int(ends[ti])
+        profile = task_table.profile[ti]
+
+        if frozen[ti]:
+            assignments.append(_frozen_assignment(task_table, ti, current_assignees[ti] if has_assignee[ti] else "UNASSIGNED", skill_index))
+            continue
+        if as_of is not None and d0 < as_of:
+            d0 = as_of  # In flight without an assignee: all of the effort still has to fit in the days left
+
+
+        # Only employees passing the mandatory-skill and coverage checks are visited
+        candidate_idx = eligibility.eligible(tid)
+
+        if team_first and department_index is not None:
+            candidate_idx = department_index.order_candidates(candidate_idx, str(task_table.department[ti]))
+
+        # Score every employee against this task's skills in one pass
+        allocated_totals = batch_person_allocated_skill_total(skills_req, skill_index)
+        missing_mask, coverage_risks = batch_coverage_missing_and_risk(skills_req, skill_index)
+
+        # Skill risks for every candidate at once
+        gap_skill_risks, skill_risks = candidate_skill_risks(required_total, allocated_totals[candidate_idx], coverage_risks[candidate_idx])
+
+        best = None
+        best_key = None  # (overall risk, delay days, candidate position) of the current best
+        best_span = None  # (first, last) day ordinal the current best would be loaded over
+
+        # With a shortlist, only the best skill fits are evaluated; the list widens while nobody on it
+        # can take the task. Without one there is a single tier holding every candidate.
+        shortlist = skill_shortlist_tiers(allocated_totals[candidate_idx], shortlist_k)
+        for tier_no, tier in enumerate(shortlist):
+            if tier_no > 0:
+                shortlist_widenings += 1
+                if tier_no == 1:
+                    shortlist_widened_tasks += 1
+
+            # Capacity and estimated peak utilization for every candidate in the tier at once
+            if placement == "water_fill":
+                has_cap, peak_utils = batch_water_fill_capacity(candidate_idx[tier], d0, d1, effort, load, emp_caps)
+            else:
+                has_cap, peak_utils = batch_has_capacity_for_task(candidate_idx[tier], d0, d1, effort, load, emp_caps, max_utilization=1.0, profile=profile)
+
+            # Evaluate candidates in ascending skill risk (candidate order within ties). Skill risk is
+            # a lower bound on overall risk, so once it exceeds the best overall risk found so far no
+            # remaining candidate can win and the schedule and delay evaluation is skipped for them.
+            # Picking the lowest (overall risk, delay, position) keeps the original tie-breaking.
+            evaluable = has_cap | shift_to_fit
+            tier_pos = np.flatnonzero(evaluable)
+            tier_pos = tier_pos[np.argsort(skill_risks[tier[tier_pos]], kind="stable")]
+
+            for j in tier_pos:
+                k = tier[j]
+                ei = candidate_idx[k]
+                emp = employees[ei]
+                if best_key is not None:
+                    if skill_risks[k] > best_key[0]:
+                        break  # Cannot beat the current best - neither can anyone after
+                    if skill_risks[k] == best_key[0] and best_key[1] <= 0 and k > best_key[2]:
+                        continue  # Can at best tie on risk and delay, and loses the tie on position
+                # STEP 1 (mandatory skills, importance >= threshold) and STEP 1b (at least SOME
+                # matching skills) are already applied: candidate_idx only holds eligible employees
+
+                # STEP 2: Check capacity availability within the task's time frame
+                # Employees without capacity were filtered out above unless start shifting is on
+                estimated_peak_util = float(peak_utils[j])
+                start_shift = 0
+                if not has_cap[j] and placement == "water_fill":
+                    # Effort spills past the end date rather than the start moving, within the same slack
+                    if estimate_delay_days(emp, d0, d1, effort, load, emp_fte) > max_start_slack:
+                        continue
+                    estimated_peak_util = water_fill_peak_util(emp, d0, effort, load, emp_fte)
+                elif not has_cap[j]:
+                    # Look for the earliest start within the slack at which they do have capacity
+                    slot = earliest_feasible_start([ei], d0, d1, effort, load, emp_caps, max_utilization=1.0, profile=profile, max_shift_days=max_start_slack)
+                    if slot is None:
+                        continue  # No capacity within the allowed slack - skip
+                    start_shift = slot[2]
+                    _, shifted_peak = batch_has_capacity_for_task([ei], d0 + start_shift, d1 + start_shift, effort, load, emp_caps, max_utilization=1.0, profile=profile)
+                    estimated_peak_util = float(shifted_peak[0])
+                s0 = d0 + start_shift
+                s1 = d1 + start_shift
+
+                # STEP 3: Calculate skill match (for risk calculation, not for filtering)
+                # Employee has all mandatory skills and capacity - calculate their skill match
+                allocated_total = float(allocated_totals[ei])
+
+                # STEP 3: Calculate risks only for employees with skills AND capacity
+                gap_skill_risk = float(gap_skill_risks[k])
+                missing_skills = task_table.missing_names(ti, missing_mask[ei])
+                coverage_risk = float(coverage_risks[ei])
+                skill_risk = float(skill_risks[k])
+
+                # Use the estimated peak utilization from capacity check
+                util_peak = estimated_peak_util
+                delay_days = start_shift + estimate_delay_days(emp, s0, s1, effort, load, emp_fte)
+                # Ensure delay_days is an integer for the comparison
+                delay_days_int = int(round(delay_days))
+                sched_risk = compute_schedule_risk(util_peak, delay_days_int)
+
+                overall = max(skill_risk, sched_risk)
+
+                if best_key is None or (overall, delay_days, k) < best_key:
+                    best = {
+                        "task_id": tid,
+                        "task_name": task_table.task_name[ti],
+                        "department": task_table.department[ti],
+                        "priority": task_table.priority[ti],
+                        "phase": task_table.phase[ti],
+                        "assignee": emp,
+                        "work_size": task_table.work_size[ti],
+                        "skill_required_total": required_total,
+                        "skill_allocated_total": allocated_total,
+                        "skill_delta": allocated_total - required_total,
+                        "missing_skills": ", ".join(missing_skills) if missing_skills else "",
+                        "coverage_risk": float(coverage_risk),
+                        "gap_skill_risk": float(gap_skill_risk),
+                        "skill_risk": skill_risk,
+                        "schedule_risk": sched_risk,
+                        "overall_risk": overall,
+                        "risk_band": risk_band(overall),
+                        "expected_delay_days": int(delay_days),
+                        "target_start": ordinal_date(task_table.start[ti]),
+                        "target_end": ordinal_date(task_table.end[ti]),
+                        "planned_start": axis_date(s0),
+                        "planned_finish": axis_date(d1 + int(delay_days)),
+                        "_excel_order": task_table.excel_order[ti],
+                        "pinned": False,
+                    }
+                    best_key = (overall, delay_days, k)
+                    best_span = (s0, d1 + int(delay_days))
+
+            if best is not None:
+                break  # Someone on the shortlist can take the task - no need to widen
+
+        if best is None:
+            # No one has skills AND capacity - flag as unassigned with delay
+            # Estimate delay from the earliest start at which any eligible employee has capacity
+            estimated_delay = 0
+            scored = ~((allocated_totals[candidate_idx] <= 0) & (required_total > 0))
+            if placement == "water_fill":
+                delays = [estimate_delay_days(employees[ei], d0, d1, effort, load, emp_fte) for ei in candidate_idx[scored]]
+                estimated_delay = min(delays, default=0)
+            else:
+                earliest_slot = earliest_feasible_start(candidate_idx[scored], d0, d1, effort, load, emp_caps, max_utilization=1.0, profile=profile)
+                if earliest_slot is not None:
+                    estimated_delay = earliest_slot[2]
+
+            best = {
+                "task_id": tid,
+                "task_name": task_table.task_name[ti],
+                "department": task_table.department[ti],
+                "priority": task_table.priority[ti],
+                "phase": task_table.phase[ti],
+                "assignee": "UNASSIGNED",
+                "work_size": task_table.work_size[ti],
+                "skill_required_total": required_total,
+                "skill_allocated_total": 0.0,
+                "skill_delta": -required_total,
+                "missing_skills": ", ".join(task_table.skill_names_of(ti)),
+                "coverage_risk": 100.0,
+                "gap_skill_risk": 100.0,
+                "skill_risk": 100.0,
+                "schedule_risk": 100.0,
+                "overall_risk": 100.0,
+                "risk_band": "Critical",
+                "expected_delay_days": estimated_delay,  # Flag delay when unassigned due to capacity
+                "target_start": ordinal_date(task_table.start[ti]),
+                "target_end": ordinal_date(task_table.end[ti]),
+                "planned_start": axis_date(d0),
+                "planned_finish": axis_date(d1 + estimated_delay),
+                "_excel_order": task_table.excel_order[ti],
+                "pinned": False,
+            }
+
+        if best["assignee"] != "UNASSIGNED" and placement == "water_fill":
+            water_fill_task_load(best["assignee"], best_span[0], effort, load, emp_fte)
+        elif best["assignee"] != "UNASSIGNED":
+            add_task_load(best["assignee"], best_span[0], best_span[1], effort, load, profile=profile)
+
+        assignments.append(best)
+
+    stats = {
+        "shortlist_widenings": shortlist_widenings,
+        "shortlist_widened_tasks": shortlist_widened_tasks,
+        "unrostered_assignees": _unrostered_assignees(assignments, skill_index),
+    }
+    return assignments, stats
+
+
+def _assignee_skill_fields(task_table: TaskTable, ti: int, assignee: str, skill_index: SkillIndex) -> dict:
+    """Skill columns of an output row for task ti done by ``assignee`` (unknown ids have no skills)."""
+    skills_req = task_table.requirements(ti)
+    required_total = float(task_table.required_total[ti])
+    ei = skill_index.emp_pos.get(assignee)
+    if ei is None:
+        allocated_total = 0.0
+        missing_skills = task_table.skill_names_of(ti)
+        coverage_risk = 100.0 if missing_skills else 0.0
+    else:
+        allocated_total = float(batch_person_allocated_skill_total(skills_req, skill_index)[ei])
+        missing_mask, coverage_risks = batch_coverage_missing_and_risk(skills_req, skill_index)
+        missing_skills = task_table.missing_names(ti, missing_mask[ei])
+        coverage_risk = float(coverage_risks[ei])
+    gap_skill_risk = compute_skill_risk(required_total, allocated_total)
+    return {
+        "skill_required_total": required_total,
+        "skill_allocated_total": allocated_total,
+        "skill_delta": allocated_total - required_total,
+        "missing_skills": ", ".join(missing_skills),
+        "coverage_risk": coverage_risk,
+        "gap_skill_risk": gap_skill_risk,
+        "skill_risk": max(gap_skill_risk, coverage_risk),
+    }
+
+
+def _unrostered_assignees(assignments: list, skill_index: SkillIndex) -> list:
+    """(task_id, assignee) of pinned rows whose assignee is not a known employee."""
+    return [
+        (row["task_id"], row["assignee"]) for row in assignments
+        if row["pinned"] and row["assignee"] != "UNASSIGNED" and row["assignee"] not in skill_index.emp_pos
+    ]
+
+
+def _frozen_assignment(task_table: TaskTable, ti: int, assignee: str, skill_index: SkillIndex) -> dict:
+    """Output row for a task kept as planned in rolling-horizon mode: skill risk only, no delay."""
+    skill = _assignee_skill_fields(task_table, ti, assignee, skill_index)
+    d0 = ordinal_date(task_table.start[ti])
+    d1 = ordinal_date(task_table.end[ti])
+    return {
+        "task_id": task_table.task_id[ti],
+        "task_name": task_table.task_name[ti],
+        "department": task_table.department[ti],
+        "priority": task_table.priority[ti],
+        "phase": task_table.phase[ti],
+        "assignee": assignee,
+        "work_size": task_table.work_size[ti],
+        **skill,
+        "schedule_risk": 0.0,
+        "overall_risk": skill["skill_risk"],
+        "risk_band": risk_band(skill["skill_risk"]),
+        "expected_delay_days": 0,
+        "target_start": d0,
+        "target_end": d1,
+        "planned_start": d0,
+        "planned_finish": d1,
+        "_excel_order": task_table.excel_order[ti],
+        "pinned": True,
+    }
+
+
+def _balanced_batches(labels: np.ndarray, n_batches: int) -> List[np.ndarray]:
+    """Group task positions by component into at most ``n_batches`` batches of similar task counts."""
+    sizes = np.bincount(labels)
+    batches = [[] for _ in range(min(n_batches, len(sizes)))]
+    totals = np.zeros(len(batches), dtype=np.int64)
+    for comp in np.argsort(-sizes, kind="stable"):
+        b = int(np.argmin(totals))
+        batches[b].append(comp)
+        totals[b] += sizes[comp]
+    return [np.flatnonzero(np.isin(labels, comps)) for comps in batches if comps]
+
+
+def allocate_tasks_parallel(
+    task_table: TaskTable,
+    skill_index: SkillIndex,
+    eligibility: EligibilityMatrix,
+    emp_fte: Dict[str, float],
+    workers: int = 1,
+    **options,
+) -> Tuple[list, dict]:
+    """
+    allocate_tasks split over the connected components of the eligibility graph.
+
+    Components share no employees, so each batch of components is allocated
+    independently in a process pool and the rows are merged back into
+    TaskTable order; the result is identical to the serial run. Falls back
+    to allocate_tasks with one worker or a single component.
+    """
+    labels = eligibility.components()
+    if workers <= 1 or labels.max(initial=0) == 0:
+        return allocate_tasks(task_table, skill_index, eligibility, emp_fte, **options)
+    batches = _balanced_batches(labels, workers)
+    assignments = [None] * len(task_table)
+    stats = {"shortlist_widenings": 0, "shortlist_widened_tasks": 0}
+    with ProcessPoolExecutor(max_workers=len(batches)) as pool:
+        futures = [
+            pool.submit(allocate_tasks, task_table, skill_index, eligibility, emp_fte, positions=batch, **options)
+            for batch in batches
+        ]
+        for batch, future in zip(batches, futures):
+            rows, batch_stats = future.result()
+            for pos, row in zip(batch, rows):
+                assignments[pos] = row
+            for key in stats:
+                stats[key] += batch_stats[key]
+    stats["unrostered_assignees"] = _unrostered_assignees(assignments, skill_index)
+    return assignments, stats
+
+
+# ============================================
+# RESOURCE LEVELING
+# ============================================
+
+def _utilization_stats(load: np.ndarray, col_caps: np.ndarray) -> Tuple[float, float]:
+    """(peak, variance) of utilization over every employee x column cell."""
+    if load.size == 0:
+        return 0.0, 0.0
+    util = load / col_caps
+    return float(util.max()), float(util.var())
+
+
+def level_resources(
+    assignments: list,
+    task_table: TaskTable,
+    skill_index: SkillIndex,
+    eligibility: EligibilityMatrix,
+    emp_fte: Dict[str, float],
+    bucket_days: int = 1,
+    max_shift_days: int = 0,
+    time_budget: float = 2.0,
+    placement: str = "profile",
+    availability: Optional[AvailabilityCalendar] = None,
+    business_days: Optional[BusinessDays] = None,
+    as_of: Optional[Day] = None,
+) -> Tuple[list, dict]:
+    """
+    Lower peak utilization after the greedy pass by moving or reassigning tasks.
+
+    ``assignments`` are allocate_tasks rows in TaskTable order. Repeatedly
+    takes the most utilized employee and tries, for each of their tasks
+    covering the peak column:
+
+    - shifting it within its slack: back towards its target start, or up to
+      ``max_shift_days`` later (whole buckets in bucketed mode)
+    - handing it to another eligible employee whose skill risk for the task
+      is no higher, over the same window
+
+    The move that gives the lowest resulting peak of the employees involved
+    is applied if that is below the current peak. Pinned and unassigned tasks
+    never move. Stops when no employee can be improved or ``time_budget``
+    seconds have passed. ``placement``, ``availability`` and
+    ``business_days`` must match the allocation so the load is rebuilt the
+    same way. In rolling-horizon mode pass the allocation's ``as_of``: load
+    is then only tracked from that day on, like in allocate_tasks, so frozen
+    history neither sets the peaks nor shows up in the stats, and no task is
+    shifted back before it.
+
+    Returns (assignments, stats); moved tasks get their new assignee, dates,
+    delay and risks. stats holds peak/variance of utilization before and
+    after, the number of shifts and reassignments, and the time spent.
+    """
+    t_start = time.perf_counter()
+    employees = skill_index.employees
+    bd = max(1, int(bucket_days))
+    rows = list(assignments)
+    placed = [ti for ti, row in enumerate(rows) if row["assignee"] in skill_index.emp_pos]
+    placed.sort(key=lambda ti: not rows[ti].get("pinned", False))  # Pinned load went in first
+    stats = {"peak_before": 0.0, "peak_after": 0.0, "variance_before": 0.0, "variance_after": 0.0,
+             "shifts": 0, "reassignments": 0, "seconds": 0.0}
+    if not placed:
+        return rows, stats
+
+    # Rows hold calendar dates; on a business-day axis the math runs on business-day indices
+    if business_days is None:
+        start_of = end_of = day_ordinal
+        axis_date = ordinal_date
+    else:
+        bd = business_days.bucket_days(bd)
+        axis_date = business_days.date
+
+        def start_of(d):
+            return int(business_days.start_index(day_ordinal(d)))
+
+        def end_of(d):
+            return int(business_days.end_index(day_ordinal(d)))
+
+    starts = {ti: start_of(rows[ti]["planned_start"]) for ti in placed}
+    ends = {ti: end_of(rows[ti]["planned_finish"]) for ti in placed}
+    first_day = min(min(starts.values()), min(start_of(rows[ti]["target_start"]) for ti in placed))
+    if as_of is not None:
+        as_of = start_of(as_of)
+        first_day = as_of
+    matrix = LoadMatrix(employees, first_day, max(ends.values()) + max(0, int(max_shift_days)),
+                        bucket_days=bd, availability=availability, business_days=business_days)
+    if matrix.n_cols == 0:
+        return rows, stats
+    emp_caps = capacity_vector(employees, emp_fte)
+    col_caps = matrix.col_capacities(np.arange(len(employees)), 0, matrix.n_cols, emp_caps)
+
+    # Column placement (first column, per-column amounts) and owner of every placed task. Profile
+    # placements also keep the profile before the availability reweighting (fit_effort), so a task
+    # moved to another employee or window is refitted to that row's availability.
+    span = {}
+    profile_amounts = {}
+    owner = {}
+    tasks_of = {}
+
+    def fitted(ti, rows_, lo):
+        """Amounts task ti would put on each of ``rows_`` from column lo (one shared row without reweighting)."""
+        if profile_amounts.get(ti) is None:
+            return span[ti][1].reshape(1, -1)
+        return matrix.fit_effort(rows_, lo, profile_amounts[ti])
+
+    for ti in placed:
+        owner[ti] = skill_index.emp_pos[rows[ti]["assignee"]]
+        if placement == "water_fill" and not rows[ti].get("pinned", False):
+            cap = float(emp_fte.get(rows[ti]["assignee"], 1.0))
+            lo, amounts = matrix.water_fill(rows[ti]["assignee"], starts[ti], float(task_table.effort[ti]), cap if cap > 0 else 0.01)
+        else:
+            num_days = _window_len(starts[ti], ends[ti])
+            per_day = float(task_table.effort[ti]) * effort_kernel(num_days, task_table.profile[ti]) / num_days
+            lo, profile_amounts[ti] = matrix.spread(starts[ti], per_day)
+            amounts = matrix.fit_effort([owner[ti]], lo, profile_amounts[ti])[0]
+        matrix.add_columns(rows[ti]["assignee"], lo, amounts)
+        span[ti] = (lo, np.asarray(amounts, dtype=float))
+        tasks_of.setdefault(owner[ti], []).append(ti)
+    load = matrix.load
+    n_cols = matrix.n_cols
+    stats["peak_before"], stats["variance_before"] = _utilization_stats(load, col_caps)
+
+    def placed_peak(row_load, lo, amounts, row_caps):
+        """Peak utilization of a row after adding amounts from column lo (clipped to the horizon)."""
+        a, b = max(lo, 0), min(lo + len(amounts), n_cols)
+        util = row_load / row_caps
+        util[a:b] = (row_load[a:b] + amounts[a - lo:b - lo]) / row_caps[a:b]
+        return max(util.max(), 0.0)
+
+    row_peak = (load / col_caps).max(axis=1)
+    stuck = np.zeros(len(employees), dtype=bool)
+    stuck[[e for e in range(len(employees)) if e not in tasks_of]] = True
+    moved = set()
+    while not stuck.all() and time.perf_counter() - t_start < time_budget:
+        e = int(np.argmax(np.where(stuck, -np.inf, row_peak)))
+        peak = row_peak[e]
+        c = int(np.argmax(load[e] / col_caps[e]))
+        best = None  # (resulting peak, kind, |shift|, ti, new owner, column shift)
+        for ti in tasks_of.get(e, []):
+            if rows[ti].get("pinned", False):
+                continue
+            lo, amounts = span[ti]
+            if not lo <= c < lo + len(amounts):
+                continue
+            base = load[e].copy()
+            a, b = max(lo, 0), min(lo + len(amounts), n_cols)
+            base[a:b] -= amounts[a - lo:b - lo]
+            # Shifts: back to the target start at the earliest, forward by at most max_shift_days
+            earliest = start_of(rows[ti]["target_start"]) if as_of is None else max(as_of, start_of(rows[ti]["target_start"]))
+            back = max(0, (starts[ti] - earliest) // bd)
+            for k in range(-back, max(0, int(max_shift_days)) // bd + 1):
+                if k == 0:
+                    continue
+                new_peak = placed_peak(base, lo + k, fitted(ti, [e], lo + k)[0], col_caps[e])
+                cand = (new_peak, 0, abs(k), ti, e, k)
+                if new_peak < peak and (best is None or cand < best):
+                    best = cand
+            # Reassignments to equally or better skilled eligible employees
+            others = eligibility.eligible(task_table.task_id[ti])
+            others = others[others != e]
+            if len(others):
+                gap, risk = candidate_skill_risks(
+                    float(task_table.required_total[ti]),
+                    batch_person_allocated_skill_total(task_table.requirements(ti), skill_index)[np.r_[e, others]],
+                    batch_coverage_missing_and_risk(task_table.requirements(ti), skill_index)[1][np.r_[e, others]],
+                )
+                others = others[risk[1:] <= risk[0]]
+            if len(others):
+                window = np.zeros((len(others), len(amounts)))
+                window[:, a - lo:b - lo] = load[others, a:b]
+                window_caps = matrix.col_capacities(others, lo, len(amounts), emp_caps[others])
+                dest_peak = np.maximum(row_peak[others], ((window + fitted(ti, others, lo)) / window_caps).max(axis=1))
+                src_peak = (base / col_caps[e]).max()
+                j = int(np.argmin(dest_peak))
+                new_peak = max(src_peak, float(dest_peak[j]))
+                cand = (new_peak, 1, 0, ti, int(others[j]), 0)
+                if new_peak < peak and (best is None or cand < best):
+                    best = cand
+        if best is None:
+            stuck[e] = True
+            continue
+        _, kind, _, ti, dest, k = best
+        lo, amounts = span[ti]
+        a, b = max(lo, 0), min(lo + len(amounts), n_cols)
+        load[e, a:b] -= amounts[a - lo:b - lo]
+        lo += k
+        amounts = fitted(ti, [dest], lo)[0]
+        a, b = max(lo, 0), min(lo + len(amounts), n_cols)
+        load[dest, a:b] += amounts[a - lo:b - lo]
+        span[ti] = (lo, amounts)
+        if dest != e:
+            tasks_of[e].remove(ti)
+            tasks_of.setdefault(dest, []).append(ti)
+            owner[ti] = dest
+            stats["reassignments"] += 1
+        else:
+            starts[ti] += k * bd
+            ends[ti] += k * bd
+            stats["shifts"] += 1
+        moved.add(ti)
+        for r in {e, dest}:
+            row_peak[r] = (load[r] / col_caps[r]).max()
+            stuck[r] = False
+
+    # Moved rows get their new assignee and dates, then are rescored together
+    moved = sorted(moved)
+    util_peaks, delays = [], []
+    for ti in moved:
+        row = dict(rows[ti])
+        assignee = employees[owner[ti]]
+        if assignee != row["assignee"]:
+            row.update(_assignee_skill_fields(task_table, ti, assignee, skill_index))
+            row["assignee"] = assignee
+        delays.append(max(0, ends[ti] - end_of(row["target_end"])))
+        lo, amounts = span[ti]
+        a, b = max(lo, 0), min(lo + len(amounts), n_cols)
+        util_peaks.append(float((load[owner[ti], a:b] / col_caps[owner[ti], a:b]).max()) if a < b else 0.0)
+        row.update({
+            "expected_delay_days": delays[-1],
+            "planned_start": axis_date(starts[ti]),
+            "planned_finish": axis_date(ends[ti]),
+        })
+        rows[ti] = row
+    if moved:
+        sched_risks = compute_schedule_risk_array(util_peaks, delays)
+        overall = np.maximum([rows[ti]["skill_risk"] for ti in moved], sched_risks)
+        for ti, sched_risk, risk, band in zip(moved, sched_risks, overall, risk_band_array(overall)):
+            rows[ti].update({
+                "schedule_risk": float(sched_risk),
+                "overall_risk": float(risk),
+                "risk_band": str(band),
+            })
+    stats["peak_after"], stats["variance_after"] = _utilization_stats(load, col_caps)
+    stats["seconds"] = time.perf_counter() - t_start
+    return rows, stats
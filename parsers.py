@@ -56,6 +56,52 @@ def size_to_effort(s):
     return 2.0
 
 
+def parse_weekday(v):
+    """
+    Weekday as 0 (Monday) .. 6 (Sunday), or None for a blank cell.
+
+    Accepts names and unambiguous abbreviations ("Fri", "Fr", "Thurs.")
+    and the numbers 0-6. Raises ValueError for anything else, so a typo
+    is never read as "no weekday" (every day).
+    """
+    if v is None or pd.isna(v):
+        return None
+    s_str = str(v).strip().lower().rstrip(".")
+    if not s_str:
+        return None
+    names = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+    matches = [i for i, name in enumerate(names) if len(s_str) >= 2 and name.startswith(s_str)]
+    if len(matches) == 1:
+        return matches[0]
+    try:
+        num_val = float(s_str)
+    except ValueError:
+        num_val = None
+    if num_val is not None and num_val.is_integer() and 0 <= num_val <= 6:
+        return int(num_val)
+    raise ValueError(f"Unknown weekday {v!r}; use Mon..Sun or 0 (Monday) - 6 (Sunday)")
+
+
+def to_availability(v):
+    """
+    Availability as a fraction of FTE in 0-1.
+
+    Accepts fractions (0.5) and percentages ("50%"). Raises ValueError for
+    blanks, text and values outside 0-1 / 0-100%, rather than guessing.
+    """
+    s_str = "" if v is None or pd.isna(v) else str(v).strip()
+    percent = s_str.endswith("%")
+    try:
+        num_val = float(s_str.rstrip("%").strip())
+    except ValueError:
+        raise ValueError(f"Invalid availability {v!r}; use a fraction 0-1 or a percentage such as 50%") from None
+    if percent:
+        num_val /= 100.0
+    if not 0.0 <= num_val <= 1.0:
+        raise ValueError(f"Invalid availability {v!r}; use a fraction 0-1 or a percentage such as 50%")
+    return num_val
+
+
 def parse_skills_importance_cell(v, max_items: int = 3):
     """Parse skills and importance from cell.
 